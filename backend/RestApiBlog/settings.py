@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 # from decouple import config
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -130,6 +131,27 @@ STATIC_ROOT = BASE_DIR / "static"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# media is served by blog.views.ProtectedMediaView; with nginx in front
+# (MEDIA_ACCEL_REDIRECT=True in the environment) it only checks access and
+# hands the file to nginx's internal location
+MEDIA_ACCEL_REDIRECT = os.environ.get("MEDIA_ACCEL_REDIRECT", "False") == "True"
+MEDIA_ACCEL_REDIRECT_LOCATION = "/protected-media/"
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+# resized copies generated in the background for uploaded images
+IMAGE_VARIANT_WIDTHS = [320, 640, 1024]
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANT_PATH = "variants/"
+# horizontal and vertical components of the blurhash placeholders
+IMAGE_BLURHASH_COMPONENTS = (4, 3)
+POST_IMAGE_BATCH_MAX_FILES = 50
+
+# resumable chunked uploads; keep the temp dir outside MEDIA_ROOT
+CHUNKED_UPLOAD_TEMP_DIR = BASE_DIR / "tmp" / "uploads"
+CHUNKED_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRY = timedelta(days=1)
+# a chunk still being received after this long no longer blocks its offset
+CHUNKED_UPLOAD_CHUNK_TIMEOUT = timedelta(minutes=10)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -139,16 +161,13 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "accounts.User"
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    # picks cookie JWT, header JWT, Token, Basic or Session per request
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "accounts.api.v1.authentications.CookieJWTAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
-        "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.api.v1.authentications.DispatchAuthentication",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "accounts.throttles.SlidingWindowAnonRateThrottle",
+        "accounts.throttles.SlidingWindowUserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/day",
@@ -156,7 +175,13 @@ REST_FRAMEWORK = {
         "login": "5/min",
         "register": "1000/day",
     },
+    # proxies in front of Django that append to X-Forwarded-For (1 behind
+    # the stage nginx); throttles and login lockout key on the address the
+    # nearest trusted proxy saw, never on hops the client sent itself
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
 }
+# rate units one request consumes, per throttle scope (unlisted scopes cost 1)
+THROTTLE_COSTS = {}
 # email configuration
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_USE_TLS = False
@@ -171,6 +196,46 @@ CELERY_RESULT_BACKEND = "redis://redis:6379/1"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+# email, media and search work each get their own queue (and workers, see
+# docs/DEPLOYMENT.md), so a backlog of one never delays the others
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "accounts.tasks.*": {"queue": "email"},
+    "blog.tasks.*": {"queue": "media"},
+    # used once ELASTICSEARCH_DSL_SIGNAL_PROCESSOR is the Celery processor
+    "django_elasticsearch_dsl.signals.*": {"queue": "search"},
+}
+# redis broker priorities: 0 is served first, 9 last
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "queue_order_strategy": "priority",
+    "priority_steps": list(range(10)),
+    "sep": ":",
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+# prefetching would let low priority tasks overtake ones queued later
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BEAT_SCHEDULE = {
+    "cleanup-upload-sessions": {
+        "task": "blog.tasks.cleanup_upload_sessions",
+        "schedule": 60 * 60,
+    },
+    # safety net for flushes lost with a crashed worker
+    "flush-email-outbox": {
+        "task": "accounts.tasks.flush_email_outbox",
+        "schedule": 60,
+    },
+}
+# batched email: messages are queued in a Redis list (the "email" cache
+# alias) and sent in batches of up to EMAIL_BATCH_SIZE over one connection,
+# at most EMAIL_BATCH_WINDOW seconds after the first one was queued
+EMAIL_BATCH_SIZE = 50
+EMAIL_BATCH_WINDOW = 2
+EMAIL_MAX_RETRIES = 3
+# a failed message returns to the outbox after EMAIL_RETRY_DELAY seconds,
+# doubled on each further attempt
+EMAIL_RETRY_DELAY = 30
+# a flush holds its lock until this many seconds pass without sending a message
+EMAIL_FLUSH_LOCK_TIMEOUT = 60
 # caching config
 CACHES = {
     "default": {
@@ -179,7 +244,16 @@ CACHES = {
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
         },
-    }
+    },
+    # the email outbox; clearing the default cache leaves it alone and its
+    # keys never expire, so a volatile-* or noeviction maxmemory policy keeps them
+    "email": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://redis:6379/3",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+    },
 }
 # cors headers config
 CORS_ALLOWED_ORIGINS = [
@@ -191,6 +265,46 @@ CORS_ALLOW_CREDENTIALS = True
 
 ELASTICSEARCH_DSL = {"default": {"hosts": "http://elasticsearch:9200"}}
 
+# search backend config
+# use "blog.search_backends.InMemorySearchBackend" for tests and single-node
+# deployments without Elasticsearch; index autosync is then switched off.
+SEARCH_BACKEND = "blog.search_backends.ElasticsearchSearchBackend"
+ELASTICSEARCH_DSL_AUTOSYNC = SEARCH_BACKEND.endswith("ElasticsearchSearchBackend")
+SEARCH_TRIGRAM_THRESHOLD = 0.3
+
+# search result cache config
+SEARCH_CACHE_TIMEOUT = 60
+SEARCH_PAGE_SIZE = 10
+SEARCH_SUGGEST_SIZE = 5
+SEARCH_SUGGEST_MAX_SIZE = 10
+SEARCH_SUGGEST_TIMEOUT = "50ms"
+SEARCH_BATCH_MAX_QUERIES = 10
+
+# users loaded by JWT authentication are cached in Redis and in a small
+# per-process LRU, keyed by their auth version (bumped on every user save)
+AUTH_USER_CACHE_TIMEOUT = 60
+AUTH_USER_CACHE_LOCAL_SIZE = 1024
+# DRF token key -> user id mapping, cached the same way
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+AUTH_TOKEN_CACHE_LOCAL_SIZE = 1024
+# validated JWTs kept per process until they expire
+JWT_VALIDATION_CACHE_SIZE = 4096
+# profiles are cached per user, keyed by a version bumped on every profile save
+PROFILE_CACHE_TIMEOUT = 300
+
+# processes per server process that hash passwords for the async login
+# and registration views
+PASSWORD_HASHER_POOL_SIZE = 2
+
+# failed logins are counted per account and per IP; past the threshold the
+# subject is locked out before any password hashing, doubling the delay
+# (seconds) with every further failure
+LOGIN_LOCKOUT_ACCOUNT_THRESHOLD = 5
+LOGIN_LOCKOUT_IP_THRESHOLD = 20
+LOGIN_LOCKOUT_BASE_DELAY = 1
+LOGIN_LOCKOUT_MAX_DELAY = 15 * 60
+LOGIN_FAILURE_WINDOW = 60 * 60
+
 # SIMPLE JWT CONFIG
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
@@ -199,4 +313,6 @@ SIMPLE_JWT = {
     "UPDATE_LAST_LOGIN": False,
     "ALGORITM": "HS256",
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # embeds the email claim that /me/ is answered from
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.api.v1.serializers.CustomObtainPairSerializer",
 }
@@ -22,6 +22,7 @@ from django.conf import settings
 from django.urls import include
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from blog.views import ProtectedMediaView
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -44,9 +45,14 @@ urlpatterns = [
         name="schema-swagger-ui",
     ),
     path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    # media always goes through the access check; nginx sends the bytes
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}<path:name>",
+        ProtectedMediaView.as_view(),
+        name="media",
+    ),
 ]
 
-# serving static and media for development
+# serving static for development
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
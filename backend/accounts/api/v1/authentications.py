@@ -1,7 +1,90 @@
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import HTTP_HEADER_ENCODING
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    BasicAuthentication,
+    SessionAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from accounts.cache import (
+    get_cached_user,
+    get_token_user_id,
+    set_token_user_id,
+    token_digest,
+    validated_jwts,
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Header JWT authentication that loads the user through `accounts.cache`.
+
+    Behaves like simplejwt's `JWTAuthentication`, including the inactive
+    user and revoked token checks, but a cached user costs no database
+    query.
+
+    Validated tokens are kept in a bounded per-process LRU keyed by the
+    token's SHA-256 until they expire, so a token presented again skips
+    signature verification and claim parsing. The cookie authenticator
+    shares the same LRU.
+    """
+
+    def get_validated_token(self, raw_token):
+        digest = token_digest(raw_token)
+        validated_token = validated_jwts.get(digest)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            lifetime = validated_token.get("exp", 0) - time.time()
+            if lifetime > 0:
+                validated_jwts.set(digest, validated_token, lifetime)
+        # Hand out a copy so a request never changes the cached claims.
+        token = copy.copy(validated_token)
+        token.payload = dict(validated_token.payload)
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = get_cached_user(
+                user_id,
+                lambda: self.user_model.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                ),
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
 
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
 
-class CookieJWTAuthentication(JWTAuthentication):
+        return user
+
+
+class CookieJWTAuthentication(CachedJWTAuthentication):
     def authenticate(self, request):
         access_token = request.COOKIES.get("access")
         if not access_token:
@@ -14,3 +97,132 @@ class CookieJWTAuthentication(JWTAuthentication):
 
         except Exception:
             return None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    DRF token authentication that caches the token key -> user mapping.
+
+    The mapping lives in Redis and in a bounded per-process LRU (see
+    `accounts.cache.get_token_user_id`), and the user itself comes from the
+    shared user cache, so a known token costs no database query. Deleting a
+    token, e.g. through `CustomDiscardAuthToken`, invalidates it everywhere.
+
+    `request.auth` is an unsaved `Token` carrying the key and user.
+    """
+
+    def authenticate_credentials(self, key):
+        model = self.get_model()
+        user_model = get_user_model()
+        user_id, version = get_token_user_id(key)
+        if user_id is None:
+            try:
+                token = model.objects.select_related("user").get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            set_token_user_id(key, token.user_id)
+            user = get_cached_user(token.user_id, lambda: token.user, version)
+        else:
+            try:
+                user = get_cached_user(
+                    user_id, lambda: user_model.objects.get(pk=user_id), version
+                )
+            except user_model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        return (user, model(key=key, user=user))
+
+
+class DispatchAuthentication(BaseAuthentication):
+    """
+    Single entry authenticator that picks the matching backend up front.
+
+    Instead of letting DRF walk cookie JWT, Token, Session, Basic and header
+    JWT authentication on every request, the `access` cookie, the
+    `Authorization` scheme and the session cookie are inspected once and
+    only the backend they point at runs:
+
+    * `access` cookie: `CookieJWTAuthentication`; if it does not
+      authenticate, the header is still tried, as with the old chain.
+    * `Bearer` (`SIMPLE_JWT.AUTH_HEADER_TYPES`): `CachedJWTAuthentication`.
+    * `Token`: `CachedTokenAuthentication`.
+    * `Basic`: DRF `BasicAuthentication`.
+    * session cookie and no header: `SessionAuthentication`, so the session
+      and CSRF checks only run for browser sessions.
+
+    Anonymous requests carry none of these and cost no backend at all.
+    """
+
+    cookie_backend = CookieJWTAuthentication
+    jwt_backend = CachedJWTAuthentication
+    jwt_header_types = {
+        header_type.lower().encode(HTTP_HEADER_ENCODING)
+        for header_type in api_settings.AUTH_HEADER_TYPES
+    }
+    header_backends = {
+        b"token": CachedTokenAuthentication,
+        b"basic": BasicAuthentication,
+    }
+
+    def get_header_backend(self, scheme):
+        scheme = scheme.lower()
+        if scheme in self.jwt_header_types:
+            return self.jwt_backend
+        return self.header_backends.get(scheme)
+
+    def authenticate(self, request):
+        if "access" in request.COOKIES:
+            result = self.cookie_backend().authenticate(request)
+            if result is not None:
+                return result
+
+        parts = get_authorization_header(request).split()
+        if parts:
+            backend = self.get_header_backend(parts[0])
+            return backend().authenticate(request) if backend else None
+
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return SessionAuthentication().authenticate(request)
+        return None
+
+    def authenticate_header(self, request):
+        return CachedJWTAuthentication().authenticate_header(request)
+
+
+class TokenClaimsMixin:
+    """
+    Build the user from the validated JWT's claims instead of loading it.
+
+    `request.user` becomes simplejwt's `TokenUser`, which exposes claims
+    such as `email` (embedded by `CustomObtainPairSerializer`) as
+    attributes. Inactive users and revoked tokens are not detected until
+    the access token expires, so only use it for endpoints that return
+    data already in the token.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+
+class ClaimsJWTAuthentication(TokenClaimsMixin, CachedJWTAuthentication):
+    pass
+
+
+class ClaimsCookieJWTAuthentication(TokenClaimsMixin, CookieJWTAuthentication):
+    pass
+
+
+class ClaimsDispatchAuthentication(DispatchAuthentication):
+    """
+    `DispatchAuthentication` that answers JWT requests from the token claims.
+
+    Token, Basic and session requests still load the user as usual.
+    """
+
+    cookie_backend = ClaimsCookieJWTAuthentication
+    jwt_backend = ClaimsJWTAuthentication
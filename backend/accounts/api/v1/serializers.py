@@ -1,12 +1,20 @@
 
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.authtoken.models import Token
 from accounts.models import *
 from django.contrib.auth.password_validation import validate_password
 from accounts.models import User
 from django.contrib.auth import authenticate
 from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from accounts.lockout import (
+    check_login_lockout,
+    record_login_failure,
+    reset_login_failures,
+)
 from rest_framework import serializers
 
 
@@ -16,10 +24,16 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     Validates that:
     - Password and password confirmation match
-    - Email is not already registered
     - Password meets Django's strength requirements
 
-    On success, creates a new user instance using `create_user()`.
+    On success, creates a new user instance using `create_user()`, together
+    with its profile and, when saved with ``create_token=True``, an auth
+    token, all in one transaction.
+
+    Email uniqueness is left to the database's unique constraint instead of
+    a look-up before the insert, which would cost a query and still race
+    with concurrent registrations. A duplicate email raises a
+    `ValidationError` from `save()`; other integrity errors propagate.
     """
 
     password2 = serializers.CharField(max_length=255, write_only=True)
@@ -27,19 +41,29 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["email", "password", "password2"]
+        extra_kwargs = {"email": {"validators": []}}
 
     def create(self, validated_data):
         validated_data.pop("password2")
-        return User.objects.create_user(**validated_data)
+        create_token = validated_data.pop("create_token", False)
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(**validated_data)
+                if create_token:
+                    Token.objects.create(user=user)
+        except IntegrityError:
+            # only a registration that lost the race for its email is the
+            # client's fault; any other constraint failure is a bug
+            email = User.objects.normalize_email(validated_data["email"])
+            if not User.objects.filter(email=email).exists():
+                raise
+            raise serializers.ValidationError({"email": ["Email already registered"]})
+        return user
 
     def validate(self, data):
-        email = data["email"]
         if data["password"] != data["password2"]:
             raise serializers.ValidationError({"password2": "Passwords do not match"})
 
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError({"email": "Email already registered"})
-
         try:
             validate_password(data.get("password"))
         except ValidationError as e:
@@ -56,6 +80,9 @@ class CustomAuthTokenSerializer(serializers.Serializer):
     Validates user credentials using Django's `authenticate` method.
     On successful authentication, the authenticated user is attached to the
     validated data under the 'user' key.
+
+    Accounts and IPs with too many recent failures are rejected by
+    `accounts.lockout` before any password is hashed.
     """
 
     email = serializers.CharField(label=_("Email"), write_only=True)
@@ -71,8 +98,10 @@ class CustomAuthTokenSerializer(serializers.Serializer):
         password = attrs.get("password")
 
         if username and password:
+            request = self.context.get("request")
+            check_login_lockout(username, request)
             user = authenticate(
-                request=self.context.get("request"),
+                request=request,
                 username=username,
                 password=password,
             )
@@ -81,8 +110,10 @@ class CustomAuthTokenSerializer(serializers.Serializer):
             # users. (Assuming the default ModelBackend authentication
             # backend.)
             if not user:
+                record_login_failure(username, request)
                 msg = _("Unable to log in with provided credentials.")
                 raise serializers.ValidationError(msg, code="authorization")
+            reset_login_failures(username)
         else:
             msg = _('Must include "username" and "password".')
             raise serializers.ValidationError(msg, code="authorization")
@@ -115,11 +146,28 @@ class CustomObtainPairSerializer(TokenObtainPairSerializer):
     ------
     - This serializer is typically used with a custom TokenObtainPairView.
     - Make sure your user model has an `email` field accessible via `self.user.email`.
+    - The `email` is also embedded as a claim in the tokens (and in access
+      tokens refreshed from them), so `/me/` can answer without a query.
+    - Accounts and IPs with too many recent failures are rejected by
+      `accounts.lockout` before any password is hashed.
     """
 
-    def validate(self, attrs):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["email"] = user.email
+        return token
 
-        validated_data = super().validate(attrs)
+    def validate(self, attrs):
+        email = attrs.get(self.username_field)
+        request = self.context.get("request")
+        check_login_lockout(email, request)
+        try:
+            validated_data = super().validate(attrs)
+        except AuthenticationFailed:
+            record_login_failure(email, request)
+            raise
+        reset_login_failures(email)
         validated_data["email"] = self.user.email
         validated_data["user_id"] = self.user.id
         return validated_data
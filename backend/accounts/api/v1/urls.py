@@ -10,6 +10,7 @@ from rest_framework_simplejwt.views import (
 app_name = "api-v1"
 urlpatterns = [
     path("register/", RegisterView.as_view(), name="register"),
+    path("async/register/", AsyncRegisterView.as_view(), name="async-register"),
     path(
         "token/register/",
         SendTokenActivationRegisterView.as_view(),
@@ -22,6 +23,7 @@ urlpatterns = [
     path("jwt/refresh/", TokenRefreshView.as_view(), name="jwt-refresh"),
     path("jwt/verify/", TokenVerifyView.as_view(), name="jwt-verify"),
     path("jwt/custom/", CustomTokenPairView.as_view(), name="jwt-custom"),
+    path("async/jwt/create/", AsyncTokenPairView.as_view(), name="async-jwt-create"),
     path("jwt/custom/delete", CustomJwtRemoveCookies.as_view(), name="jwt_delete"),
     path("change/password", ChangePasswordView.as_view(), name="change-password"),
     path("profile/", ProfileApiView.as_view(), name="profile"),
@@ -1,5 +1,15 @@
+import json
+import math
+
 import jwt
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
@@ -10,12 +20,14 @@ from .serializers import *
 from rest_framework.authtoken import views
 from rest_framework.authtoken.models import Token
 from rest_framework_simplejwt.views import TokenObtainPairView
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from accounts.tasks import *
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from accounts.throttles import LoginThrottle, RegisterThrottle
+from accounts.api.v1.authentications import ClaimsDispatchAuthentication
+from accounts.cache import bump_auth_version, get_cached_profile
+from accounts.hashing import acheck_password, amake_password
+from accounts.lockout import get_lockout_wait, record_login_failure, reset_login_failures
 
 User = get_user_model()
 
@@ -61,7 +73,8 @@ class SendTokenActivationRegisterView(GenericAPIView):
         - If the data is valid:
             - Creates the user.
             - Generates a JWT token.
-            - Sends an activation email using a template and includes the token in the email context.
+            - Queues the token email and the templated activation email as
+              Celery tasks; rendering and SMTP happen in the worker.
         - Returns appropriate success or error responses.
 
         Returns:
@@ -71,33 +84,21 @@ class SendTokenActivationRegisterView(GenericAPIView):
         data = request.data
         serializer = self.serializer_class(data=data)
         if serializer.is_valid():
-            serializer.save()
-            user = get_object_or_404(User, email=serializer.validated_data["email"])
+            user = serializer.save()
 
-            refresh = RefreshToken.for_user(user)
+            # carries an `email` claim, so activation needs no user lookup
+            refresh = CustomObtainPairSerializer.get_token(user)
             access_token = str(refresh.access_token)
+            # Both emails are rendered and sent by Celery workers; the
+            # response only waits for the tasks to be queued.
             send_activation_email.delay(user.email, user.email, access_token)
-
-            message_body = f"""
-                    Hello {user.email},
-
-                    Here is your JWT access token:
-                    {access_token}
-
-                    If you did not request this, please ignore this email.
-                    """
-
-            from mail_templated import EmailMessage
-
-            email = EmailMessage(
+            send_templated_email.delay(
                 "email/activation_email.tpl",
-                {"token": str(access_token)},
+                {"token": access_token},
                 "noreply@example.com",
-                to=[user.email],
+                [user.email],
             )
 
-            email.send()
-
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -137,14 +138,15 @@ class RegisterView(GenericAPIView):
         """
         Handle POST request to register a new user.
         Validates the input data using UserRegistrationSerializer.
-        On success, saves the user and returns serialized user data.
-        On failure, returns validation errors.
+        On success, saves the user, its profile and auth token in one
+        transaction and returns serialized user data.
+        On failure (including an already registered email), returns
+        validation errors.
         """
         data = request.data
         serializer = self.serializer_class(data=data)
         if serializer.is_valid():
-            user = serializer.save()
-            token = Token.objects.create(user=user)
+            serializer.save(create_token=True)
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
@@ -231,7 +233,8 @@ class CustomDiscardAuthToken(views.APIView):
         Handle POST request to log out the user by deleting their authentication token.
 
         - Requires the user to be authenticated.
-        - Deletes the current user's token from the database.
+        - Deletes the current user's token from the database; deleting it
+          also drops it from the token authentication cache.
         - Returns a 204 No Content response on success.
 
         Returns:
@@ -278,7 +281,7 @@ class CustomTokenPairView(TokenObtainPairView):
 
     def post(self, request):
         data = request.data
-        serializer = self.serializer_class(data=data)
+        serializer = self.serializer_class(data=data, context={"request": request})
         if serializer.is_valid():
             access_token = serializer.validated_data["access"]
             refresh_token = serializer.validated_data["refresh"]
@@ -377,6 +380,22 @@ class ChangePasswordView(UpdateAPIView):
             return Response(serializer.errors)
 
 
+def get_user_profile(user):
+    """
+    Return ``user``'s profile (with its user) through the profile cache.
+
+    Raises:
+        Http404: The user has no profile.
+    """
+    try:
+        return get_cached_profile(
+            user.pk,
+            lambda: Profile.objects.select_related("user").get(user_id=user.pk),
+        )
+    except Profile.DoesNotExist:
+        raise Http404
+
+
 class ProfileApiView(GenericAPIView):
     """
     ProfileApiView allows an authenticated user to retrieve and update their profile.
@@ -423,10 +442,10 @@ class ProfileApiView(GenericAPIView):
     """
 
     serializer_class = ProfileSerializer
-    queryset = Profile.objects.all()
+    queryset = Profile.objects.select_related("user")
 
     def get(self, request):
-        obj = get_object_or_404(Profile, user=self.request.user)
+        obj = get_user_profile(request.user)
         serializer = self.serializer_class(instance=obj, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -461,20 +480,20 @@ class SendEmailView(GenericAPIView):
     """
 
     def get(self, request, *args, **kwargs):
-        send_mail(
+        send_email.delay(
             subject="Test Email",
             message="This is a test email from Django to smtp4dev.",
             from_email="test@example.com",
             recipient_list=["recipient@example.com"],
-            fail_silently=False,
         )
         return Response({"massage": "email send successfully "})
 
 
 def send_mail_with_template(template_name, context, from_email, recipient_list):
     subject = "Your Subject"
-    message = render_to_string(template_name, context)
-    send_mail(subject, message, from_email, recipient_list)
+    send_email.delay(
+        subject, "", from_email, recipient_list, template_name=template_name, context=context
+    )
 
 
 class SendEmailApiView(GenericAPIView):
@@ -520,13 +539,12 @@ class SendEmailApiView(GenericAPIView):
         If you did not request this, please ignore this email.
         """
 
-        # Send the email
-        send_mail(
+        # Queue the email; the worker talks to SMTP
+        send_email.delay(
             subject="Test Email",
             message="This is a test email from Django to smtp4dev.",
             from_email="test@example.com",
             recipient_list=["recipient@example.com"],
-            fail_silently=False,
         )
 
         return Response({"message": "Token sent via email"}, status=status.HTTP_200_OK)
@@ -558,9 +576,13 @@ class ActivationApiView(APIView):
 
     ### Process:
     1. The token is decoded using the project’s SECRET_KEY.
-    2. If the token is valid and not expired, the user is retrieved using the ID from the token.
-    3. The user's `is_verified` field is set to `True`.
-    4. Returns a message indicating successful activation.
+    2. If the token is valid and not expired, a single conditional
+       `UPDATE ... SET is_verified = true WHERE id = <user_id> AND NOT is_verified`
+       activates the user without loading the row.
+    3. Only if that changed a row, the confirmation email is queued and the
+       user's cached auth data is invalidated, once the update commits.
+    4. Returns a message indicating successful activation. Opening the link
+       again returns the same response and changes nothing.
 
     ### Possible Responses:
     - 200 OK: Account successfully activated.
@@ -594,9 +616,24 @@ class ActivationApiView(APIView):
             return Response(
                 data={"detail": "invalid token"}, status=status.HTTP_400_BAD_REQUEST
             )
-        user = User.objects.get(pk=user_id)
-        user.is_verified = True
-        user.save()
+        activated = (
+            User.objects.filter(pk=user_id)
+            .exclude(is_verified=True)
+            .update(is_verified=True, updated_date=timezone.now())
+        )
+        if activated:
+            email = token.get("email") or (
+                User.objects.values_list("email", flat=True).get(pk=user_id)
+            )
+            # `update()` skips post_save, so invalidate cached copies here
+            transaction.on_commit(lambda: bump_auth_version(user_id))
+            transaction.on_commit(
+                lambda: send_activation_confirmation_email.delay(email, email)
+            )
+        elif not User.objects.filter(pk=user_id).exists():
+            return Response(
+                data={"detail": "invalid token"}, status=status.HTTP_400_BAD_REQUEST
+            )
         return Response(
             data={"detail": "user has been activated"}, status=status.HTTP_200_OK
         )
@@ -640,7 +677,7 @@ class ActivationResendApiView(GenericAPIView):
     ### Notes:
     - Ensure the `ActivationResendSerializer` properly validates the email and returns the associated user instance.
     - The email is rendered using the template `email/activation_email.tpl`. Make sure this file exists and is properly configured.
-    - Tokens are generated using `RefreshToken.for_user(user)`.
+    - Tokens are generated using `CustomObtainPairSerializer.get_token(user)`, so they carry the `email` claim.
     """
 
     serializer_class = ActivationResendSerializer
@@ -649,7 +686,7 @@ class ActivationResendApiView(GenericAPIView):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data.get("user")
-            refresh = RefreshToken.for_user(user)
+            refresh = CustomObtainPairSerializer.get_token(user)
             access_token = str(refresh.access_token)
 
             try:
@@ -689,19 +726,27 @@ class GetUserAPIView(GenericAPIView):
         GET:
             Returns the authenticated user's basic account information.
 
+    JWT requests are answered from the token's claims (see
+    `ClaimsDispatchAuthentication`), so the user row is never loaded; tokens
+    issued before the `email` claim existed fall back to a single query.
+
     Returns:
         - 200 OK: A JSON object containing the user's `id` and `email`.
         - 401 Unauthorized: If the user is not authenticated.
     """
     permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsDispatchAuthentication]
 
     def get(self, request):
         user = request.user
+        email = user.email
+        if email is None:
+            email = User.objects.values_list("email", flat=True).get(pk=user.id)
 
         return Response(
             {
                 "id": user.id,
-                "email": user.email,
+                "email": email,
             }
         )
 
@@ -716,10 +761,12 @@ class ProfileDetail(GenericAPIView):
 
     Methods:
         GET:
-            Returns the authenticated user's profile data.
+            Returns the authenticated user's profile data, served from the
+            versioned per-user profile cache.
 
         PUT:
-            Updates the authenticated user's profile with the provided data.
+            Updates the authenticated user's profile with the provided data
+            and invalidates the cached profile.
             Returns a success message if the update is successful; otherwise,
             returns serializer validation errors.
 
@@ -735,15 +782,17 @@ class ProfileDetail(GenericAPIView):
     serializer_class = ProfileSerializer
 
     def get(self, request):
-        user = request.user
-        profile = Profile.objects.get(user=user)
+        profile = get_user_profile(request.user)
 
         serializer = self.serializer_class(instance=profile)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request):
-        user = request.user
-        profile = Profile.objects.get(user=user)
+        # writes start from the database row, never from the cached copy;
+        # saving it bumps the profile version, invalidating the cache
+        profile = get_object_or_404(
+            Profile.objects.select_related("user"), user_id=request.user.pk
+        )
 
         serializer = self.serializer_class(instance=profile, data=request.data)
         if serializer.is_valid():
@@ -774,3 +823,177 @@ class CustomJwtRemoveCookies(GenericAPIView):
         res.delete_cookie("access")
         res.delete_cookie("refresh")
         return res
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncJSONView(View):
+    """
+    Base class for the async account views served under ASGI.
+
+    These are plain Django async views rather than DRF views, so the event
+    loop is never blocked: request bodies are parsed as JSON by hand and
+    throttles run in a thread via `sync_to_async`.
+    """
+
+    throttle_classes = []
+
+    def parse_json(self, request):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    async def check_throttles(self, request):
+        """Return a 429 response if any throttle denies the request, else None."""
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not await sync_to_async(throttle.allow_request)(request, self):
+                response = JsonResponse(
+                    {"detail": "Request was throttled."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                )
+                wait = throttle.wait()
+                if wait is not None:
+                    response["Retry-After"] = str(int(wait))
+                return response
+        return None
+
+
+class AsyncTokenPairView(AsyncJSONView):
+    """
+    Async JWT login that hashes passwords in a process pool.
+
+    POST /accounts/api/v1/async/jwt/create/
+    ---------------------------------------
+
+    ### Request Body (JSON):
+    {
+        "email": "user@example.com",
+        "password": "user_password"
+    }
+
+    ### Successful Response (200 OK):
+    {
+        "refresh": "...",
+        "access": "...",
+        "email": "user@example.com",
+        "user_id": 5
+    }
+
+    ### Error Response (401 Unauthorized):
+    {
+        "detail": "No active account found with the given credentials"
+    }
+
+    ### Notes:
+    - Same tokens as `CustomObtainPairSerializer`, so they carry the `email` claim.
+    - The password check runs in `accounts.hashing`'s process pool, so a
+      login burst does not occupy the event loop. Unknown emails still pay
+      one hash, so response times do not reveal which accounts exist.
+    - Locked out accounts and IPs (`accounts.lockout`) get a 429 before
+      any hashing.
+    """
+
+    throttle_classes = [LoginThrottle]
+
+    async def post(self, request):
+        throttled = await self.check_throttles(request)
+        if throttled:
+            return throttled
+
+        data = self.parse_json(request)
+        if not data or not data.get("email") or not data.get("password"):
+            return JsonResponse(
+                {"detail": 'Must include "email" and "password".'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        email = data["email"]
+        wait = await sync_to_async(get_lockout_wait)(email, request)
+        if wait > 0:
+            response = JsonResponse(
+                {"detail": "Too many failed login attempts. Try again later."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+            response["Retry-After"] = str(math.ceil(wait))
+            return response
+
+        try:
+            user = await User.objects.aget(email=email)
+        except User.DoesNotExist:
+            await amake_password(data["password"])
+            user = None
+
+        authenticated = user is not None and await acheck_password(user, data["password"])
+        if not authenticated or not user.is_active:
+            await sync_to_async(record_login_failure)(email, request)
+            return JsonResponse(
+                {"detail": "No active account found with the given credentials"},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        await sync_to_async(reset_login_failures)(email)
+
+        refresh = CustomObtainPairSerializer.get_token(user)
+        return JsonResponse(
+            {
+                "refresh": str(refresh),
+                "access": str(refresh.access_token),
+                "email": user.email,
+                "user_id": user.id,
+            }
+        )
+
+
+class AsyncRegisterView(AsyncJSONView):
+    """
+    Async registration that hashes the new password in a process pool.
+
+    POST /accounts/api/v1/async/register/
+    -------------------------------------
+
+    Accepts and validates the same body as `RegisterView`, with
+    `UserRegistrationSerializer`, and returns the same responses; the user
+    also gets an auth token.
+    """
+
+    throttle_classes = [RegisterThrottle]
+
+    async def post(self, request):
+        throttled = await self.check_throttles(request)
+        if throttled:
+            return throttled
+
+        data = self.parse_json(request)
+        if data is None:
+            return JsonResponse(
+                {"detail": "JSON parse error"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = UserRegistrationSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        encoded = await amake_password(serializer.validated_data["password"])
+        try:
+            user = await sync_to_async(self.create_user)(
+                serializer.validated_data["email"], encoded
+            )
+        except IntegrityError:
+            # like the serializer, only a lost race for the email is a 400
+            email = User.objects.normalize_email(serializer.validated_data["email"])
+            if not await User.objects.filter(email=email).aexists():
+                raise
+            return JsonResponse(
+                {"email": ["Email already registered"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return JsonResponse({"email": user.email}, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def create_user(email, encoded_password):
+        with transaction.atomic():
+            user = User(email=User.objects.normalize_email(email), password=encoded_password)
+            user.save()
+            Token.objects.create(user=user)
+        return user
@@ -0,0 +1,197 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+AUTH_VERSION_KEY = "auth:version:{}"
+AUTH_USER_KEY = "auth:user:{}:{}"
+AUTH_TOKEN_KEY = "auth:token:{}"
+PROFILE_VERSION_KEY = "profile:version:{}"
+PROFILE_KEY = "profile:{}:{}"
+
+
+class LocalLRUCache:
+    """
+    Bounded, thread-safe in-process cache with a per-entry timeout.
+
+    Used in front of Redis for data read on every authenticated request.
+    The least recently used entry is dropped once `maxsize` is reached.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+local_users = LocalLRUCache(settings.AUTH_USER_CACHE_LOCAL_SIZE)
+local_tokens = LocalLRUCache(settings.AUTH_TOKEN_CACHE_LOCAL_SIZE)
+validated_jwts = LocalLRUCache(settings.JWT_VALIDATION_CACHE_SIZE)
+
+
+def get_auth_version(user_id):
+    """Return the auth version stamp of a user (0 when never bumped)."""
+    return cache.get(AUTH_VERSION_KEY.format(user_id), 0)
+
+
+def bump_auth_version(user_id):
+    """
+    Invalidate every cached copy of a user at once.
+
+    Cached users are keyed by the version stamp, so incrementing it makes
+    the Redis entries unreachable and the local entries fail their version
+    check in every process.
+    """
+    local_users.delete(user_id)
+    return _incr_version(AUTH_VERSION_KEY.format(user_id))
+
+
+def _incr_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def get_cached_user(user_id, loader, version=None):
+    """
+    Return the user ``user_id`` from the local LRU, Redis or ``loader``.
+
+    The version stamp is read from Redis on every call, so a deactivation or
+    password change is seen by all processes right after it commits. Each
+    call returns a copy, so a request that modifies its user never changes
+    the cached instance.
+
+    Args:
+        user_id: Primary key of the user.
+        loader (callable): Loads the user from the database on a miss; any
+            exception it raises (e.g. ``DoesNotExist``) is propagated and
+            nothing is cached.
+        version: The user's current auth version, when the caller already
+            read it.
+    """
+    if version is None:
+        version = get_auth_version(user_id)
+    entry = local_users.get(user_id)
+    if entry is not None and entry[0] == version:
+        return copy.copy(entry[1])
+
+    key = AUTH_USER_KEY.format(user_id, version)
+    user = cache.get(key)
+    if user is None:
+        user = loader()
+        cache.set(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+    local_users.set(user_id, (version, user), settings.AUTH_USER_CACHE_TIMEOUT)
+    return copy.copy(user)
+
+
+def token_digest(key):
+    """Hash a token so the secret itself is never used as a cache key."""
+    if isinstance(key, str):
+        key = key.encode()
+    return hashlib.sha256(key).hexdigest()
+
+
+def get_token_user_id(key):
+    """
+    Return ``(user_id, auth_version)`` for a cached DRF token key.
+
+    Local entries remember the owner's auth version when they were cached
+    and are only trusted while it is unchanged, so deleting the token in
+    any process (which bumps the version) invalidates them everywhere.
+
+    Returns:
+        tuple: ``(None, None)`` when the key is not cached.
+    """
+    digest = token_digest(key)
+    entry = local_tokens.get(digest)
+    if entry is not None:
+        user_id, version = entry
+        if get_auth_version(user_id) == version:
+            return user_id, version
+
+    user_id = cache.get(AUTH_TOKEN_KEY.format(digest))
+    if user_id is None:
+        return None, None
+    version = get_auth_version(user_id)
+    local_tokens.set(digest, (user_id, version), settings.AUTH_TOKEN_CACHE_TIMEOUT)
+    return user_id, version
+
+
+def set_token_user_id(key, user_id):
+    cache.set(
+        AUTH_TOKEN_KEY.format(token_digest(key)),
+        user_id,
+        timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_token(key, user_id):
+    """Forget a deleted DRF token in Redis and, via its owner's auth version, in every process."""
+    digest = token_digest(key)
+    local_tokens.delete(digest)
+    cache.delete(AUTH_TOKEN_KEY.format(digest))
+    bump_auth_version(user_id)
+
+
+def bump_profile_version(user_id):
+    """Invalidate the cached profile of a user, in Redis and every process."""
+    return _incr_version(PROFILE_VERSION_KEY.format(user_id))
+
+
+def get_cached_profile(user_id, loader):
+    """
+    Return the profile of user ``user_id`` from Redis or ``loader``.
+
+    Entries are keyed by the profile version stamp, so a reader that loaded
+    the row just before a concurrent update cannot put stale data back
+    under the current key.
+
+    Args:
+        user_id: Primary key of the profile's user.
+        loader (callable): Loads the profile on a miss; exceptions (e.g.
+            ``DoesNotExist``) propagate and nothing is cached.
+    """
+    version = cache.get(PROFILE_VERSION_KEY.format(user_id), 0)
+    key = PROFILE_KEY.format(user_id, version)
+    profile = cache.get(key)
+    if profile is None:
+        profile = loader()
+        cache.set(key, profile, timeout=settings.PROFILE_CACHE_TIMEOUT)
+    return profile
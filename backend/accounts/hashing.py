@@ -0,0 +1,60 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+
+
+def _setup_worker():
+    """Make Django settings available in a freshly started pool process."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "RestApiBlog.settings")
+    django.setup()
+
+
+@lru_cache(maxsize=None)
+def get_hasher_pool():
+    """
+    Return the process pool password hashing runs in.
+
+    At most `PASSWORD_HASHER_POOL_SIZE` processes are started per server
+    process, so login bursts queue up here instead of occupying the event
+    loop or every request worker with PBKDF2.
+    """
+    return ProcessPoolExecutor(
+        max_workers=settings.PASSWORD_HASHER_POOL_SIZE,
+        initializer=_setup_worker,
+    )
+
+
+async def _run_in_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hasher_pool(), func, *args)
+
+
+async def amake_password(password):
+    """Hash ``password`` with the default hasher in the hashing pool."""
+    return await _run_in_pool(make_password, password)
+
+
+async def acheck_password(user, password):
+    """
+    Check ``password`` against ``user``'s hash in the hashing pool.
+
+    Like `User.check_password`, a correct password stored with outdated
+    hasher parameters is re-hashed (again in the pool) and saved.
+    """
+    encoded = user.password
+    if not await _run_in_pool(check_password, password, encoded):
+        return False
+    try:
+        must_update = identify_hasher(encoded).must_update(encoded)
+    except ValueError:
+        must_update = False
+    if must_update:
+        user.password = await amake_password(password)
+        await user.asave(update_fields=["password"])
+    return True
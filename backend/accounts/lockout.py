@@ -0,0 +1,87 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+FAILURES_KEY = "lockout:failures:{}:{}"
+LOCKED_UNTIL_KEY = "lockout:until:{}:{}"
+
+
+def _subjects(email, request):
+    """
+    Return ``(kind, identifier, threshold)`` for everything a login attempt
+    is counted against: the account, and the client IP when known.
+    """
+    subjects = []
+    if email:
+        digest = hashlib.sha1(email.strip().casefold().encode()).hexdigest()
+        subjects.append(("account", digest, settings.LOGIN_LOCKOUT_ACCOUNT_THRESHOLD))
+    if request is not None:
+        ip = BaseThrottle().get_ident(request)
+        if ip:
+            subjects.append(("ip", ip, settings.LOGIN_LOCKOUT_IP_THRESHOLD))
+    return subjects
+
+
+def get_lockout_wait(email, request):
+    """
+    Return how many seconds the account or IP is still locked out, or 0.
+
+    Costs one cache round trip and no password hashing, so it runs before
+    `authenticate()`.
+    """
+    keys = [LOCKED_UNTIL_KEY.format(kind, ident) for kind, ident, _ in _subjects(email, request)]
+    locked_until = cache.get_many(keys).values()
+    return max([until - time.time() for until in locked_until] + [0])
+
+
+def check_login_lockout(email, request):
+    """Raise `Throttled` (429 with `Retry-After`) if the login is locked out."""
+    wait = get_lockout_wait(email, request)
+    if wait > 0:
+        raise Throttled(
+            wait=wait, detail="Too many failed login attempts. Try again later."
+        )
+
+
+def record_login_failure(email, request):
+    """
+    Count a failed login for the account and the IP.
+
+    Once a counter reaches its threshold, the subject is locked for
+    `LOGIN_LOCKOUT_BASE_DELAY` seconds, doubling with every further failure
+    up to `LOGIN_LOCKOUT_MAX_DELAY`. Counters reset
+    `LOGIN_FAILURE_WINDOW` seconds after the first failure.
+    """
+    for kind, ident, threshold in _subjects(email, request):
+        key = FAILURES_KEY.format(kind, ident)
+        if cache.add(key, 1, timeout=settings.LOGIN_FAILURE_WINDOW):
+            failures = 1
+        else:
+            try:
+                failures = cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, timeout=settings.LOGIN_FAILURE_WINDOW)
+                failures = 1
+        if failures >= threshold:
+            delay = min(
+                settings.LOGIN_LOCKOUT_BASE_DELAY * 2 ** (failures - threshold),
+                settings.LOGIN_LOCKOUT_MAX_DELAY,
+            )
+            cache.set(
+                LOCKED_UNTIL_KEY.format(kind, ident),
+                time.time() + delay,
+                timeout=math.ceil(delay),
+            )
+
+
+def reset_login_failures(email):
+    """Forget an account's failures after a successful login; IP counters stay."""
+    for kind, ident, _ in _subjects(email, None):
+        cache.delete_many(
+            [FAILURES_KEY.format(kind, ident), LOCKED_UNTIL_KEY.format(kind, ident)]
+        )
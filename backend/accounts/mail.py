@@ -0,0 +1,252 @@
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_KEY = "email:outbox"
+FLUSH_SCHEDULED_KEY = "email:outbox:scheduled"
+FLUSH_LOCK_KEY = "email:outbox:lock"
+
+# Drop the first ARGV[2] messages of the outbox and renew the flush lock, but
+# only while the lock still holds this flush's token.
+#
+# KEYS[1]  flush lock
+# KEYS[2]  outbox list
+# ARGV[1]  token of the flush
+# ARGV[2]  number of messages handled
+# ARGV[3]  lock timeout in milliseconds
+#
+# Returns 1 when the lock was still held, else 0 and changes nothing.
+ACK_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('LTRIM', KEYS[2], ARGV[2], -1)
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def serialize_message(message, attempts=0):
+    """Return a rendered email message as a JSON-safe dict."""
+    return {
+        "subject": message.subject,
+        "body": message.body,
+        "from_email": message.from_email,
+        "to": list(message.to),
+        "cc": list(message.cc),
+        "bcc": list(message.bcc),
+        "reply_to": list(message.reply_to),
+        "alternatives": [list(alt) for alt in getattr(message, "alternatives", [])],
+        "content_subtype": message.content_subtype,
+        "attempts": attempts,
+    }
+
+
+def deserialize_message(data, connection=None):
+    message = EmailMultiAlternatives(
+        subject=data["subject"],
+        body=data["body"],
+        from_email=data["from_email"],
+        to=data["to"],
+        cc=data["cc"],
+        bcc=data["bcc"],
+        reply_to=data["reply_to"],
+        alternatives=[tuple(alt) for alt in data["alternatives"]],
+        connection=connection,
+    )
+    message.content_subtype = data["content_subtype"]
+    return message
+
+
+def get_outbox():
+    """
+    Return the Redis connection of the ``email`` cache alias.
+
+    The outbox is a plain list there, apart from the default cache: its keys
+    never expire, so neither clearing the cache nor eviction drops queued mail.
+    """
+    return get_redis_connection("email")
+
+
+def schedule_flush():
+    """Queue a flush `EMAIL_BATCH_WINDOW` seconds from now, unless one is pending."""
+    from accounts.tasks import flush_email_outbox
+
+    if get_outbox().set(
+        FLUSH_SCHEDULED_KEY, 1, nx=True, ex=settings.EMAIL_FLUSH_LOCK_TIMEOUT
+    ):
+        flush_email_outbox.apply_async(countdown=settings.EMAIL_BATCH_WINDOW)
+
+
+def queue_email(message, attempts=0):
+    """
+    Append a rendered message to the shared outbox instead of sending it.
+
+    The first message of a burst schedules a flush after
+    `EMAIL_BATCH_WINDOW` seconds, and every `EMAIL_BATCH_SIZE`-th pending
+    message flushes right away, so a registration spike is sent in batches
+    rather than one SMTP session per email.
+
+    Returns:
+        int: The number of messages pending, this one included.
+    """
+    from accounts.tasks import flush_email_outbox
+
+    pending = get_outbox().rpush(
+        OUTBOX_KEY, json.dumps(serialize_message(message, attempts))
+    )
+    if pending % settings.EMAIL_BATCH_SIZE == 0:
+        flush_email_outbox.delay()
+    else:
+        schedule_flush()
+    return pending
+
+
+def take_batch():
+    """Return up to `EMAIL_BATCH_SIZE` messages from the head of the outbox."""
+    return [
+        json.loads(data)
+        for data in get_outbox().lrange(OUTBOX_KEY, 0, settings.EMAIL_BATCH_SIZE - 1)
+    ]
+
+
+class FlushLock:
+    """
+    The lock that keeps a single flush running, held under a random token.
+
+    It expires `EMAIL_FLUSH_LOCK_TIMEOUT` seconds after the last message was
+    acknowledged, so a crashed worker never blocks the outbox for long while
+    a slow batch keeps it for as long as it makes progress.
+    """
+
+    def __init__(self):
+        self.client = get_outbox()
+        self.token = uuid.uuid4().hex
+        self.timeout = settings.EMAIL_FLUSH_LOCK_TIMEOUT * 1000
+        self.held = False
+
+    def acquire(self):
+        self.held = bool(
+            self.client.set(FLUSH_LOCK_KEY, self.token, nx=True, px=self.timeout)
+        )
+        return self.held
+
+    def ack(self, count=1):
+        """
+        Remove ``count`` handled messages from the outbox and renew the lock.
+
+        Returns False, removing nothing, once the lock has expired: another
+        flush may have started on the same messages by then.
+        """
+        self.held = bool(
+            self.client.eval(
+                ACK_SCRIPT, 2, FLUSH_LOCK_KEY, OUTBOX_KEY, self.token, count, self.timeout
+            )
+        )
+        return self.held
+
+    def release(self):
+        self.client.eval(RELEASE_SCRIPT, 1, FLUSH_LOCK_KEY, self.token)
+        self.held = False
+
+
+def retry_later(data, attempts):
+    """
+    Put a message back in the outbox after `EMAIL_RETRY_DELAY` seconds,
+    doubled for every further attempt, instead of in the running flush.
+    """
+    from accounts.tasks import requeue_email
+
+    requeue_email.apply_async(
+        args=[{**data, "attempts": attempts}],
+        countdown=settings.EMAIL_RETRY_DELAY * 2 ** max(attempts - 1, 0),
+    )
+
+
+def send_batch(messages, lock):
+    """
+    Send ``messages`` over a single email backend connection.
+
+    Every message is acknowledged on ``lock`` once it is handled, which
+    removes it from the outbox; the batch stops as soon as the lock is lost.
+    A message that fails is closed off from the rest: the connection is
+    reopened for the next message and the failed one is retried later, up
+    to `EMAIL_MAX_RETRIES` attempts. If the connection cannot be reopened,
+    the rest of the batch is retried later as well. Failing to open the
+    connection at all propagates, leaving the batch in the outbox.
+
+    Returns:
+        int: The number of messages sent.
+    """
+    sent = 0
+    with get_connection() as connection:
+        for index, data in enumerate(messages):
+            try:
+                sent += deserialize_message(data, connection).send()
+            except Exception:
+                connection.close()
+                if data["attempts"] < settings.EMAIL_MAX_RETRIES:
+                    retry_later(data, data["attempts"] + 1)
+                else:
+                    logger.exception("Giving up on email to %s", data["to"])
+                try:
+                    connection.open()
+                except OSError:
+                    rest = messages[index + 1:]
+                    for pending in rest:
+                        retry_later(pending, pending["attempts"])
+                    lock.ack(len(rest) + 1)
+                    break
+            if not lock.ack():
+                break
+    return sent
+
+
+def flush_outbox():
+    """
+    Send everything in the outbox, batch by batch.
+
+    Only one flush runs at a time; a concurrent call returns 0 straight away.
+    A flush that loses its lock stops without removing anything further,
+    leaving the rest to the flush that took the lock over.
+
+    Returns:
+        int: The number of messages sent.
+    """
+    lock = FlushLock()
+    if not lock.acquire():
+        return 0
+    outbox = get_outbox()
+    # messages queued from now on need a flush of their own
+    outbox.delete(FLUSH_SCHEDULED_KEY)
+    sent = 0
+    try:
+        while lock.ack(0):
+            messages = take_batch()
+            if not messages:
+                break
+            sent += send_batch(messages, lock)
+        if not lock.held:
+            logger.warning("Email outbox flush lost its lock after %d messages", sent)
+            return sent
+    finally:
+        lock.release()
+    # Messages queued while this flush held the lock may have found a
+    # flush already pending that then gave up on the lock.
+    outbox.delete(FLUSH_SCHEDULED_KEY)
+    if outbox.llen(OUTBOX_KEY):
+        schedule_flush()
+    return sent
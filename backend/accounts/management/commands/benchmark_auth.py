@@ -0,0 +1,130 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import (
+    BasicAuthentication,
+    SessionAuthentication,
+    TokenAuthentication,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.api.v1.authentications import (
+    CachedJWTAuthentication,
+    CookieJWTAuthentication,
+    DispatchAuthentication,
+)
+from accounts.cache import bump_auth_version, validated_jwts
+from accounts.models import User
+
+# The authenticator chain used before DispatchAuthentication, for comparison.
+LEGACY_AUTHENTICATION_CLASSES = [
+    CookieJWTAuthentication,
+    TokenAuthentication,
+    SessionAuthentication,
+    BasicAuthentication,
+    CachedJWTAuthentication,
+]
+DISPATCH_AUTHENTICATION_CLASSES = [DispatchAuthentication]
+
+
+class Command(BaseCommand):
+    """
+    Measure the per-request cost of authentication.
+
+    Every scenario (anonymous, bearer JWT, `access` cookie, DRF token) is
+    authenticated `--iterations` times through the legacy five-authenticator
+    chain and through `DispatchAuthentication`, and the mean time and query
+    count per request are printed. A throwaway user and token are created
+    inside a transaction that is rolled back afterwards.
+
+    It then compares raw JWT validation throughput of simplejwt's
+    `JWTAuthentication` (signature check and claim parsing every time)
+    with `CachedJWTAuthentication`'s validated token LRU.
+
+    Usage:
+        python manage.py benchmark_auth --iterations 5000
+    """
+
+    help = "Compare per-request authentication overhead of the legacy chain and the dispatcher."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        with transaction.atomic():
+            user = User.objects.create_user(email="benchmark-auth@example.com")
+            try:
+                scenarios = self.build_scenarios(user)
+                self.stdout.write(
+                    f"{'scenario':<10} {'legacy µs':>10} {'queries':>8} "
+                    f"{'dispatch µs':>12} {'queries':>8}"
+                )
+                for name, http_request in scenarios.items():
+                    legacy = self.measure(http_request, LEGACY_AUTHENTICATION_CLASSES, iterations)
+                    dispatch = self.measure(
+                        http_request, DISPATCH_AUTHENTICATION_CLASSES, iterations
+                    )
+                    self.stdout.write(
+                        f"{name:<10} {legacy[0]:>10.1f} {legacy[1]:>8} "
+                        f"{dispatch[0]:>12.1f} {dispatch[1]:>8}"
+                    )
+                self.stdout.write("")
+                raw_token = str(AccessToken.for_user(user)).encode()
+                for label, authenticator in (
+                    ("jwt validation, uncached", JWTAuthentication()),
+                    ("jwt validation, LRU", CachedJWTAuthentication()),
+                ):
+                    rate = self.validation_rate(authenticator, raw_token, iterations)
+                    self.stdout.write(f"{label:<26} {rate:>10.0f} tokens/s")
+            finally:
+                bump_auth_version(user.pk)
+                transaction.set_rollback(True)
+
+    def build_scenarios(self, user):
+        factory = RequestFactory()
+        access = str(AccessToken.for_user(user))
+        token = Token.objects.create(user=user)
+
+        cookie = factory.get("/")
+        cookie.COOKIES["access"] = access
+        return {
+            "anonymous": factory.get("/"),
+            "bearer": factory.get("/", HTTP_AUTHORIZATION=f"Bearer {access}"),
+            "cookie": cookie,
+            "token": factory.get("/", HTTP_AUTHORIZATION=f"Token {token.key}"),
+        }
+
+    def authenticate(self, http_request, classes):
+        # DRF copies the authenticated user onto the wrapped HttpRequest;
+        # drop it so SessionAuthentication cannot pick it up next iteration.
+        http_request.__dict__.pop("user", None)
+        return Request(http_request, authenticators=[cls() for cls in classes]).user
+
+    def measure(self, http_request, classes, iterations):
+        """Return ``(mean µs per request, queries per request)``."""
+        # Warm up caches so the steady state is measured.
+        self.authenticate(http_request, classes)
+        with CaptureQueriesContext(connection) as queries:
+            self.authenticate(http_request, classes)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            self.authenticate(http_request, classes)
+        elapsed = time.perf_counter() - start
+        return elapsed / iterations * 1_000_000, len(queries)
+
+    def validation_rate(self, authenticator, raw_token, iterations):
+        """Return how many times per second ``raw_token`` is validated."""
+        validated_jwts.clear()
+        authenticator.get_validated_token(raw_token)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            authenticator.get_validated_token(raw_token)
+        return iterations / (time.perf_counter() - start)
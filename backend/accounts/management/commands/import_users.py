@@ -0,0 +1,185 @@
+import csv
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from accounts.models import Profile, User
+
+PROFILE_FIELDS = ("first_name", "last_name", "description")
+
+
+class Command(BaseCommand):
+    """
+    Import users and their profiles from a CSV file in batches.
+
+    The file is streamed, so its size is not limited by memory. Each batch
+    of `--batch-size` rows costs one query for already registered emails,
+    one `bulk_create` for the users and one for their profiles, in a
+    single transaction. No password is hashed and no `post_save` signal
+    runs.
+
+    Columns (header row required):
+        email (required), password, first_name, last_name, description,
+        is_verified
+
+    ``password`` must be a hash Django can verify (e.g. exported from
+    another Django site, `pbkdf2_sha256$...`). Empty passwords, or all of
+    them with `--unusable-passwords`, become unusable passwords, so those
+    users have to reset it. Rows with a plain text password, a missing
+    email or an email already seen are skipped and reported. So are emails
+    registered while the import runs: the batch that collides with one is
+    retried without it.
+
+    Usage:
+        python manage.py import_users users.csv --batch-size 2000
+        python manage.py import_users - < users.csv
+    """
+
+    help = "Bulk import users and profiles from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file, or - for standard input.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--unusable-passwords",
+            action="store_true",
+            help="Ignore the password column and give every user an unusable password.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        self.unusable_passwords = options["unusable_passwords"]
+
+        if options["path"] == "-":
+            self.run(sys.stdin, options["batch_size"])
+        else:
+            try:
+                with open(options["path"], newline="", encoding="utf-8-sig") as csv_file:
+                    self.run(csv_file, options["batch_size"])
+            except FileNotFoundError:
+                raise CommandError(f"No such file: {options['path']}")
+
+    def run(self, csv_file, batch_size):
+        reader = csv.DictReader(csv_file)
+        if not reader.fieldnames or "email" not in reader.fieldnames:
+            raise CommandError("The CSV header must contain an email column.")
+
+        self.seen = set()
+        imported = skipped = 0
+        start = time.perf_counter()
+        while batch := list(islice(reader, batch_size)):
+            created, errors = self.import_batch(batch, reader.line_num - len(batch))
+            imported += created
+            skipped += len(errors)
+            for error in errors:
+                self.stderr.write(error)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{imported + skipped} rows: {imported} imported, {skipped} skipped "
+                f"({(imported + skipped) / elapsed:.0f} rows/s)"
+            )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} users in {elapsed:.1f}s, skipped {skipped}."
+            )
+        )
+
+    def import_batch(self, rows, first_line):
+        """
+        Insert one batch of rows; returns ``(created count, error messages)``.
+
+        ``first_line`` is the CSV line number of the first row, for reporting.
+        """
+        users, profiles, lines, errors = [], [], [], []
+        for line, row in enumerate(rows, start=first_line + 1):
+            email = User.objects.normalize_email((row.get("email") or "").strip())
+            if not email:
+                errors.append(f"line {line}: missing email")
+                continue
+            if email in self.seen:
+                errors.append(f"line {line}: duplicate email {email}")
+                continue
+            try:
+                password = self.get_password(row.get("password"))
+            except ValueError:
+                errors.append(f"line {line}: password for {email} is not a known hash")
+                continue
+            self.seen.add(email)
+            users.append(
+                User(
+                    email=email,
+                    password=password,
+                    is_verified=(row.get("is_verified") or "").strip().lower()
+                    in ("1", "true", "yes"),
+                )
+            )
+            profiles.append({field: row.get(field) or "" for field in PROFILE_FIELDS})
+            lines.append(line)
+
+        error, created = None, None
+        while created is None:
+            dropped = self.drop_registered(users, profiles, lines, errors)
+            if error is not None and not dropped:
+                # the failure was not a newly registered email; keep going
+                # with the next batch instead of aborting the import
+                summary = str(error).splitlines()[0]
+                errors += [
+                    f"line {line}: {user.email} was not imported ({summary})"
+                    for line, user in zip(lines, users)
+                ]
+                return 0, errors
+            try:
+                with transaction.atomic():
+                    created = User.objects.bulk_create(users)
+                    Profile.objects.bulk_create(
+                        Profile(user=user, **fields) for user, fields in zip(created, profiles)
+                    )
+            except IntegrityError as exc:
+                # an email was registered since the look-up; look again
+                error = exc
+        return len(created), errors
+
+    def drop_registered(self, users, profiles, lines, errors):
+        """
+        Remove rows whose email is already registered, in place, reporting them.
+
+        Returns:
+            int: The number of rows removed.
+        """
+        existing = set(
+            User.objects.filter(email__in=[user.email for user in users]).values_list(
+                "email", flat=True
+            )
+        )
+        if not existing:
+            return 0
+        errors += [
+            f"line {line}: {user.email} is already registered"
+            for line, user in zip(lines, users)
+            if user.email in existing
+        ]
+        kept = [i for i, user in enumerate(users) if user.email not in existing]
+        users[:] = [users[i] for i in kept]
+        profiles[:] = [profiles[i] for i in kept]
+        lines[:] = [lines[i] for i in kept]
+        return len(existing)
+
+    def get_password(self, value):
+        """
+        Return the password column as stored, or an unusable password.
+
+        Raises:
+            ValueError: The value is not a hash of a configured hasher.
+        """
+        value = (value or "").strip()
+        if self.unusable_passwords or not value:
+            return make_password(None)
+        identify_hasher(value)
+        return value
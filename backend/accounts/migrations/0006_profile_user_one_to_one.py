@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def drop_duplicate_profiles(apps, schema_editor):
+    """Keep only the oldest profile of each user so the unique index can be built."""
+    Profile = apps.get_model("accounts", "Profile")
+    duplicated = (
+        Profile.objects.values("user")
+        .annotate(count=models.Count("id"), keep=models.Min("id"))
+        .filter(count__gt=1)
+    )
+    for row in duplicated:
+        Profile.objects.filter(user=row["user"]).exclude(id=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_profile_image_variants"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_profiles, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="profile",
+            name="user",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
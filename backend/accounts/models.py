@@ -1,8 +1,9 @@
 from django.contrib.auth.base_user import BaseUserManager
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from accounts.cache import bump_auth_version, bump_profile_version, invalidate_token
 
 
 class UserManager(BaseUserManager):
@@ -70,21 +71,24 @@ class Profile(models.Model):
     such as first name, last name, profile image, and a description.
 
     Attributes:
-        user (ForeignKey): Reference to the related User object.
+        user (OneToOneField): The owning User; unique, so each user has
+            exactly one profile (`user.profile`).
         first_name (CharField): The user's first name.
         last_name (CharField): The user's last name.
         image (ImageField): An optional image field for user avatars.
+        image_variants (JSONField): URLs of resized copies of `image`.
         description (TextField): A short bio or description.
         created_date (DateTimeField): The datetime the profile was created.
         updated_date (DateTimeField): The datetime the profile was last updated.
 
     """
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
 
     first_name = models.CharField(max_length=250)
     last_name = models.CharField(max_length=250)
     image = models.ImageField(blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField()
 
     created_date = models.DateTimeField(auto_now_add=True)
@@ -113,3 +117,85 @@ def save_profile(sender, instance, created, **kwargs):
     """
     if created:
         Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Profile)
+def profile_image_variants(sender, instance, **kwargs):
+    """
+    Signal receiver that queues resized variants of a new profile image.
+    """
+    from blog.images import schedule_image_variants
+
+    schedule_image_variants(instance, "image")
+
+
+@receiver(pre_save, sender=Profile)
+def release_replaced_profile_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Signal receiver that deletes the variants of a profile image once it is
+    replaced or cleared. Profile images are named after the uploaded file,
+    so their variants are never shared and a later upload with the same
+    name must not find them.
+    """
+    if raw or not instance.pk:
+        return
+    if update_fields is not None and "image" not in update_fields:
+        return
+    old = (
+        Profile.objects.filter(pk=instance.pk)
+        .values("image", "image_variants")
+        .first()
+    )
+    if old and old["image"] and (
+        old["image"] != instance.image.name or not instance.image._committed
+    ):
+        from blog.images import delete_stored_variants
+
+        variants = old["image_variants"]
+        transaction.on_commit(lambda: delete_stored_variants(variants))
+
+
+@receiver(post_delete, sender=Profile)
+def release_profile_variants(sender, instance, **kwargs):
+    from blog.images import delete_stored_variants
+
+    variants = instance.image_variants
+    transaction.on_commit(lambda: delete_stored_variants(variants))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    """
+    Signal receiver that, once the transaction commits, bumps the profile
+    version so the next read (e.g. after `ProfileDetail.put`) reloads it.
+    """
+    if kwargs.get("created"):
+        return
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_profile_version(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Signal receiver that, once the transaction commits, bumps the user's
+    auth version so cached copies (e.g. after a password change or
+    deactivation) are no longer used for authentication. A newly created
+    user has nothing cached yet, so registration skips the round trip.
+    """
+    if kwargs.get("created"):
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: bump_auth_version(user_id))
+
+
+@receiver(post_delete, sender="authtoken.Token")
+def invalidate_cached_token(sender, instance, **kwargs):
+    """
+    Signal receiver that, once the transaction commits, drops a deleted DRF
+    token (e.g. on logout) from the token authentication cache.
+    """
+    key, user_id = instance.key, instance.user_id
+    transaction.on_commit(lambda: invalidate_token(key, user_id))
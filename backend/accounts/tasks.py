@@ -1,9 +1,60 @@
 from celery import shared_task
+from django.conf import settings
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
+from mail_templated import EmailMessage as TemplatedEmailMessage
 
+from accounts.mail import deserialize_message, flush_outbox, queue_email
 
-@shared_task
+
+@shared_task(bind=True, ignore_result=True, priority=0, rate_limit="60/m")
+def flush_email_outbox(self):
+    """
+    Send the messages queued by the email tasks below in batches of up to
+    `EMAIL_BATCH_SIZE`, each over one SMTP connection. If the connection
+    cannot be opened, the outbox is kept and the flush retried.
+    """
+    try:
+        return flush_outbox()
+    except OSError as exc:
+        raise self.retry(exc=exc, countdown=settings.EMAIL_BATCH_WINDOW * 5)
+
+
+@shared_task(ignore_result=True, priority=1)
+def requeue_email(data):
+    """
+    Return a message whose send failed to the outbox; scheduled with a
+    countdown by `accounts.mail.retry_later`.
+    """
+    queue_email(deserialize_message(data), data["attempts"])
+
+
+@shared_task(ignore_result=True, priority=6)
+def send_email(
+    subject, message, from_email, recipient_list, template_name=None, context=None
+):
+    """
+    Queue a plain text email, so views never wait on SMTP.
+
+    When ``template_name`` is given, the message is rendered from it with
+    ``context`` here in the worker instead of using ``message``.
+    """
+    if template_name:
+        message = render_to_string(template_name, context or {})
+    queue_email(EmailMessage(subject, message, from_email, recipient_list))
+
+
+@shared_task(ignore_result=True, priority=1)
+def send_templated_email(template_name, context, from_email, recipient_list):
+    """Render a `mail_templated` template (subject, text and HTML parts) and queue it."""
+    queue_email(
+        TemplatedEmailMessage(
+            template_name, context, from_email, to=recipient_list, render=True
+        )
+    )
+
+
+@shared_task(ignore_result=True, priority=1)
 def send_activation_email(user_email, user_name, access_token):
     message_body = f"""
         Hello {user_name},
@@ -19,10 +70,10 @@ def send_activation_email(user_email, user_name, access_token):
         from_email="noreply@example.com",
         to=[user_email],
     )
-    email_message.send()
+    queue_email(email_message)
 
 
-@shared_task
+@shared_task(ignore_result=True, priority=2)
 def send_activation_confirmation_email(user_email, user_name):
     context = {
         "user_name": user_name,
@@ -35,4 +86,4 @@ def send_activation_confirmation_email(user_email, user_name):
         to=[user_email],
     )
     email_message.content_subtype = "html"
-    email_message.send()
+    queue_email(email_message)
@@ -0,0 +1,162 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, django_capture_on_commit_callbacks):
+        from django.test import RequestFactory
+
+        self.capture = django_capture_on_commit_callbacks
+        self.user = User.objects.create_user(email="jwt@test.com", password="123456")
+        self.access = str(AccessToken.for_user(self.user))
+        self.request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    def test_cached_user_costs_no_query(self, django_assert_num_queries):
+        from accounts.api.v1.authentications import CachedJWTAuthentication
+
+        CachedJWTAuthentication().authenticate(self.request)
+        with django_assert_num_queries(0):
+            user, _ = CachedJWTAuthentication().authenticate(self.request)
+        assert user == self.user
+
+    def test_deactivation_invalidates_cached_user(self):
+        from rest_framework_simplejwt.exceptions import AuthenticationFailed
+        from accounts.api.v1.authentications import CachedJWTAuthentication
+
+        CachedJWTAuthentication().authenticate(self.request)
+
+        self.user.is_active = False
+        with self.capture(execute=True):
+            self.user.save()
+
+        with pytest.raises(AuthenticationFailed):
+            CachedJWTAuthentication().authenticate(self.request)
+
+    def test_cookie_authentication_uses_the_cache(self, django_assert_num_queries):
+        from django.test import RequestFactory
+        from accounts.api.v1.authentications import CookieJWTAuthentication
+
+        request = RequestFactory().get("/")
+        request.COOKIES["access"] = self.access
+        CookieJWTAuthentication().authenticate(request)
+        with django_assert_num_queries(0):
+            user, _ = CookieJWTAuthentication().authenticate(request)
+        assert user == self.user
+
+
+@pytest.mark.django_db
+class TestValidatedJWTCache:
+
+    def test_signature_is_verified_once_per_token(self):
+        from unittest.mock import patch
+        from rest_framework_simplejwt.backends import TokenBackend
+        from accounts.api.v1.authentications import CachedJWTAuthentication
+
+        user = User.objects.create_user(email="lru@test.com", password="123456")
+        raw = str(AccessToken.for_user(user)).encode()
+        auth = CachedJWTAuthentication()
+
+        with patch.object(
+            TokenBackend, "decode", autospec=True, side_effect=TokenBackend.decode
+        ) as decode:
+            first = auth.get_validated_token(raw)
+            second = auth.get_validated_token(raw)
+
+        assert decode.call_count == 1
+        assert first["user_id"] == second["user_id"] == user.pk
+        second.payload["user_id"] = 0
+        assert auth.get_validated_token(raw)["user_id"] == user.pk
+
+    def test_invalid_token_is_not_cached(self):
+        from rest_framework_simplejwt.exceptions import InvalidToken
+        from accounts.api.v1.authentications import CachedJWTAuthentication
+        from accounts.cache import validated_jwts
+
+        with pytest.raises(InvalidToken):
+            CachedJWTAuthentication().get_validated_token(b"not.a.jwt")
+        assert len(validated_jwts) == 0
+
+
+@pytest.mark.django_db
+class TestDispatchAuthentication:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.user = User.objects.create_user(email="dispatch@test.com", password="123456")
+        self.url = reverse("accounts:api-v1:get-user")
+
+    def test_token_header_uses_token_authentication(self):
+        from rest_framework.authtoken.models import Token
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+        assert client.get(self.url).data["email"] == self.user.email
+
+    def test_basic_header_uses_basic_authentication(self):
+        import base64
+
+        client = APIClient()
+        credentials = base64.b64encode(b"dispatch@test.com:123456").decode()
+        client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+        assert client.get(self.url).status_code == 200
+
+    def test_invalid_cookie_falls_back_to_header(self):
+        client = APIClient()
+        client.cookies["access"] = "garbage"
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        assert client.get(self.url).status_code == 200
+
+    def test_session_login(self):
+        client = APIClient()
+        client.login(email="dispatch@test.com", password="123456")
+        assert client.get(self.url).status_code == 200
+
+    def test_anonymous_request_is_rejected_with_bearer_challenge(self):
+        response = APIClient().get(self.url)
+        assert response.status_code == 401
+        assert response["WWW-Authenticate"].startswith("Bearer")
+
+    def test_benchmark_command_runs(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("benchmark_auth", iterations=2, stdout=out)
+        assert "bearer" in out.getvalue()
+        assert not User.objects.filter(email="benchmark-auth@example.com").exists()
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        from rest_framework.authtoken.models import Token
+
+        self.user = User.objects.create_user(email="token@test.com", password="123456")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+        self.url = reverse("accounts:api-v1:get-user")
+
+    def test_cached_token_costs_no_query(self, django_assert_num_queries):
+        assert self.client.get(self.url).status_code == 200
+        with django_assert_num_queries(0):
+            assert self.client.get(self.url).status_code == 200
+
+    def test_logout_invalidates_cached_token(self, django_capture_on_commit_callbacks):
+        assert self.client.get(self.url).status_code == 200
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.client.post(reverse("accounts:api-v1:discard-token"))
+        assert response.status_code == 204
+
+        assert self.client.get(self.url).status_code == 401
@@ -0,0 +1,87 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+from accounts.models import Profile, User
+
+
+@pytest.mark.django_db
+class TestImportUsers:
+
+    def run(self, tmp_path, content, *args):
+        path = tmp_path / "users.csv"
+        path.write_text(content)
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_users", str(path), *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_imports_users_and_profiles_in_batches(
+        self, tmp_path, django_assert_max_num_queries
+    ):
+        hashed = make_password("Secret123!")
+        rows = "".join(f"user{i}@example.com,{hashed},First{i},,\n" for i in range(5))
+        content = "email,password,first_name,last_name,description\n" + rows
+
+        # per batch: existing emails, users, profiles (plus savepoints)
+        with django_assert_max_num_queries(3 * 5):
+            stdout, _ = self.run(tmp_path, content, "--batch-size", "2")
+
+        assert User.objects.count() == 5
+        user = User.objects.get(email="user3@example.com")
+        assert user.check_password("Secret123!")
+        assert user.profile.first_name == "First3"
+        assert "Imported 5 users" in stdout
+        assert "rows/s" in stdout
+
+    def test_unusable_and_invalid_passwords(self, tmp_path):
+        content = (
+            "email,password\n"
+            "blank@example.com,\n"
+            "plain@example.com,hunter2\n"
+        )
+        _, stderr = self.run(tmp_path, content)
+
+        assert not User.objects.get(email="blank@example.com").has_usable_password()
+        assert not User.objects.filter(email="plain@example.com").exists()
+        assert "line 3" in stderr
+
+    def test_skips_existing_and_duplicate_emails(self, tmp_path):
+        User.objects.create_user(email="taken@example.com", password="pass")
+        content = (
+            "email,is_verified\n"
+            "taken@example.com,true\n"
+            "new@example.com,true\n"
+            "new@example.com,false\n"
+        )
+        stdout, stderr = self.run(tmp_path, content, "--unusable-passwords")
+
+        assert User.objects.get(email="new@example.com").is_verified is True
+        assert Profile.objects.filter(user__email="taken@example.com").count() == 1
+        assert "line 2: taken@example.com is already registered" in stderr
+        assert "line 4: duplicate email" in stderr
+        assert "Imported 1 users" in stdout
+
+    def test_email_registered_during_import_is_skipped(self, tmp_path):
+        from unittest.mock import patch
+        from accounts.management.commands.import_users import Command
+
+        drop_registered = Command.drop_registered
+        calls = []
+
+        def register_meanwhile(command, *args):
+            removed = drop_registered(command, *args)
+            if not calls:
+                User.objects.create_user(email="race@example.com", password="pass")
+            calls.append(removed)
+            return removed
+
+        content = "email\nrace@example.com\nother@example.com\n"
+        with patch.object(Command, "drop_registered", register_meanwhile):
+            stdout, stderr = self.run(tmp_path, content, "--unusable-passwords")
+
+        assert calls == [0, 1]
+        assert User.objects.filter(email="other@example.com").exists()
+        assert "line 2: race@example.com is already registered" in stderr
+        assert "Imported 1 users" in stdout
@@ -0,0 +1,160 @@
+from unittest.mock import patch
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+
+from accounts.mail import (
+    FLUSH_LOCK_KEY,
+    OUTBOX_KEY,
+    flush_outbox,
+    get_outbox,
+    queue_email,
+)
+
+
+def message(to="user@example.com"):
+    return EmailMessage("Subject", "Body", "noreply@example.com", [to])
+
+
+class TestEmailOutbox:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        self.settings = settings
+        settings.EMAIL_BATCH_SIZE = 3
+
+    def queue_without_flush(self, count):
+        with patch("accounts.mail.schedule_flush"), patch(
+            "accounts.tasks.flush_email_outbox.delay"
+        ):
+            for i in range(count):
+                queue_email(message(f"user{i}@example.com"))
+
+    def test_batches_share_one_connection(self, mailoutbox):
+        self.queue_without_flush(7)
+
+        with patch("accounts.mail.get_connection", wraps=mail.get_connection) as connect:
+            assert flush_outbox() == 7
+
+        # batches of 3, 3 and 1
+        assert connect.call_count == 3
+        assert [m.to for m in mailoutbox] == [[f"user{i}@example.com"] for i in range(7)]
+        assert get_outbox().llen(OUTBOX_KEY) == 0
+
+    def test_full_batch_flushes_immediately(self):
+        with patch("accounts.mail.schedule_flush") as schedule, patch(
+            "accounts.tasks.flush_email_outbox.delay"
+        ) as flush:
+            for i in range(3):
+                queue_email(message(f"user{i}@example.com"))
+
+        assert schedule.call_count == 2
+        flush.assert_called_once_with()
+
+    def retry(self, data):
+        from accounts.tasks import requeue_email
+
+        with patch("accounts.mail.schedule_flush"):
+            requeue_email(data)
+            return flush_outbox()
+
+    def test_failed_message_is_retried_later_alone(self, mailoutbox):
+        from django.core.mail.backends.locmem import EmailBackend
+
+        self.settings.EMAIL_RETRY_DELAY = 30
+        self.queue_without_flush(3)
+        original_send = EmailMessage.send
+        failures = []
+
+        def flaky_send(self, *args, **kwargs):
+            if self.to == ["user1@example.com"] and not failures:
+                failures.append(self.to)
+                raise OSError("connection reset")
+            return original_send(self, *args, **kwargs)
+
+        with patch.object(EmailMessage, "send", flaky_send), patch(
+            "accounts.tasks.requeue_email.apply_async"
+        ) as requeue, patch.object(EmailBackend, "open", autospec=True) as connect:
+            assert flush_outbox() == 2
+
+        # opened for the batch, then reopened after the failure
+        assert connect.call_count == 2
+        assert [m.to for m in mailoutbox] == [["user0@example.com"], ["user2@example.com"]]
+        assert requeue.call_args.kwargs["countdown"] == 30
+        data = requeue.call_args.kwargs["args"][0]
+        assert data["to"] == ["user1@example.com"]
+        assert data["attempts"] == 1
+
+        assert self.retry(data) == 1
+        assert mailoutbox[-1].to == ["user1@example.com"]
+
+    def test_rest_of_batch_is_retried_when_reconnect_fails(self, mailoutbox):
+        from django.core.mail.backends.locmem import EmailBackend
+
+        self.queue_without_flush(3)
+
+        with patch.object(EmailMessage, "send", side_effect=OSError), patch(
+            "accounts.tasks.requeue_email.apply_async"
+        ) as requeue, patch.object(EmailBackend, "open", side_effect=[None, OSError]):
+            assert flush_outbox() == 0
+
+        retried = [c.kwargs["args"][0] for c in requeue.call_args_list]
+        assert [(d["to"], d["attempts"]) for d in retried] == [
+            (["user0@example.com"], 1),
+            (["user1@example.com"], 0),
+            (["user2@example.com"], 0),
+        ]
+        assert get_outbox().llen(OUTBOX_KEY) == 0
+
+    def test_gives_up_after_max_retries(self, mailoutbox):
+        self.settings.EMAIL_MAX_RETRIES = 2
+        self.settings.EMAIL_RETRY_DELAY = 30
+        self.queue_without_flush(1)
+
+        with patch.object(EmailMessage, "send", side_effect=OSError) as send, patch(
+            "accounts.tasks.requeue_email.apply_async"
+        ) as requeue:
+            flush_outbox()
+            for _ in range(2):
+                self.retry(requeue.call_args.kwargs["args"][0])
+
+        assert send.call_count == 3
+        assert [c.kwargs["countdown"] for c in requeue.call_args_list] == [30, 60]
+        assert mailoutbox == []
+        assert get_outbox().llen(OUTBOX_KEY) == 0
+
+    def test_flush_stops_once_its_lock_is_taken_over(self, mailoutbox):
+        self.queue_without_flush(3)
+        original_send = EmailMessage.send
+
+        def slow_send(self, *args, **kwargs):
+            # the lock expired during this send and another flush took it
+            get_outbox().set(FLUSH_LOCK_KEY, "other")
+            return original_send(self, *args, **kwargs)
+
+        with patch.object(EmailMessage, "send", slow_send):
+            assert flush_outbox() == 1
+
+        # the rest is left to the flush holding the lock; only the message in
+        # flight when the lock expired is still queued after being sent
+        assert get_outbox().llen(OUTBOX_KEY) == 3
+        assert get_outbox().get(FLUSH_LOCK_KEY) == b"other"
+
+    def test_lock_is_renewed_for_every_message(self, mailoutbox):
+        self.settings.EMAIL_FLUSH_LOCK_TIMEOUT = 60
+        self.queue_without_flush(2)
+        original_send = EmailMessage.send
+        ttls = []
+
+        def send(self, *args, **kwargs):
+            ttls.append(get_outbox().pttl(FLUSH_LOCK_KEY))
+            get_outbox().pexpire(FLUSH_LOCK_KEY, 10_000)
+            return original_send(self, *args, **kwargs)
+
+        with patch.object(EmailMessage, "send", send):
+            assert flush_outbox() == 2
+
+        # acknowledging the first message reset the lock to the full timeout
+        assert all(ttl > 50_000 for ttl in ttls)
+        assert get_outbox().get(FLUSH_LOCK_KEY) is None
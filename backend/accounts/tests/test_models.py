@@ -44,3 +44,53 @@ class TestProfileModel:
         user = User.objects.create_user(email="profileuser@example.com", password="pass")
         profile = Profile.objects.get(user=user)
         assert str(profile) == "profileuser@example.com"
+
+    def test_one_profile_per_user(self):
+        from django.db import IntegrityError, transaction
+
+        user = User.objects.create_user(email="oneprofile@example.com", password="pass")
+        assert user.profile.user_id == user.id
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Profile.objects.create(user=user)
+
+    def test_replaced_image_variants_are_deleted_and_never_reused(
+        self, settings, tmp_path, django_capture_on_commit_callbacks
+    ):
+        from io import BytesIO
+        from unittest.mock import patch
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from PIL import Image
+        from blog.tasks import generate_image_variants
+
+        settings.MEDIA_ROOT = tmp_path
+        user = User.objects.create_user(email="avatar@example.com", password="pass")
+
+        def upload(color):
+            buffer = BytesIO()
+            Image.new("RGB", (800, 400), color).save(buffer, "PNG")
+            profile = Profile.objects.get(user=user)
+            with patch("blog.tasks.generate_image_variants.delay"), (
+                django_capture_on_commit_callbacks(execute=True)
+            ):
+                profile.image.save("avatar.png", ContentFile(buffer.getvalue()))
+            generate_image_variants("accounts", "profile", profile.pk, "image", profile.image.name)
+            profile.refresh_from_db()
+            return [entry["url"] for entry in profile.image_variants["webp"]]
+
+        upload("red")
+        profile = Profile.objects.get(user=user)
+        default_storage.delete(profile.image.name)
+        profile.image = None
+        with django_capture_on_commit_callbacks(execute=True):
+            profile.save()
+        assert default_storage.listdir("variants") == ([], [])
+
+        # same file name, different content: nothing of the old image is reused
+        second = upload("blue")
+        assert len(second) == 2
+        _, files = default_storage.listdir("variants")
+        assert len(files) == 4
+        with default_storage.open(second[0][len(settings.MEDIA_URL):]) as fh:
+            red, _, blue = Image.open(fh).convert("RGB").getpixel((0, 0))
+        assert blue > red
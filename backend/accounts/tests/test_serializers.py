@@ -1,4 +1,5 @@
 import pytest
+from rest_framework import serializers
 from accounts.models import Profile
 from accounts.api.v1.serializers import (
     UserRegistrationSerializer,
@@ -45,8 +46,30 @@ class TestUserRegistrationSerializer:
             "password2": "StrongPass123!",
         }
         serializer = UserRegistrationSerializer(data=data)
-        assert not serializer.is_valid()
-        assert "email" in serializer.errors
+        # uniqueness is enforced by the insert, not by a look-up in validation
+        assert serializer.is_valid()
+        with pytest.raises(serializers.ValidationError) as exc:
+            serializer.save()
+        assert "email" in exc.value.detail
+        assert django_user_model.objects.filter(email="exists@example.com").count() == 1
+
+    def test_other_integrity_errors_propagate(self, django_user_model):
+        from unittest.mock import patch
+        from django.db import IntegrityError
+
+        data = {
+            "email": "token@example.com",
+            "password": "StrongPass123!",
+            "password2": "StrongPass123!",
+        }
+        serializer = UserRegistrationSerializer(data=data)
+        assert serializer.is_valid()
+        with patch(
+            "accounts.api.v1.serializers.Token.objects.create",
+            side_effect=IntegrityError("authtoken_token_user_id_key"),
+        ), pytest.raises(IntegrityError):
+            serializer.save(create_token=True)
+        assert not django_user_model.objects.filter(email="token@example.com").exists()
 
     def test_password_strength_validation(self):
         data = {
@@ -98,6 +121,10 @@ class TestCustomObtainPairSerializer:
         assert data["email"] == user.email
         assert data["user_id"] == user.id
 
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        assert AccessToken(data["access"])["email"] == user.email
+
 
 @pytest.mark.django_db
 class TestChangePasswordSerializer:
@@ -0,0 +1,105 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import RequestFactory
+from redis.exceptions import ConnectionError
+
+from accounts.throttles import LoginThrottle, SlidingWindowThrottleMixin
+
+
+class TestSlidingWindowThrottle:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, monkeypatch):
+        self.settings = settings
+        # the timestamp list fallback runs on the local clock, which the
+        # tests stub; the configured Redis cache would take the Lua path
+        self.redis_caches = settings.CACHES
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        }
+        monkeypatch.setitem(LoginThrottle.THROTTLE_RATES, "login", "3/min")
+        self.request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        self.request.user = AnonymousUser()
+
+    def allow(self, now=1000.0):
+        throttle = LoginThrottle()
+        throttle.timer = lambda: now
+        return throttle, throttle.allow_request(self.request, None)
+
+    def test_enforces_exact_limit(self):
+        assert [self.allow()[1] for _ in range(4)] == [True, True, True, False]
+
+    def test_window_slides(self):
+        for now in (1000.0, 1010.0, 1020.0):
+            self.allow(now)
+        throttle, allowed = self.allow(1030.0)
+        assert not allowed
+        assert throttle.wait() == pytest.approx(30.0)
+        assert self.allow(1060.0)[1]
+
+    def test_cost_weights(self):
+        self.settings.THROTTLE_COSTS = {"login": 2}
+        assert self.allow(1000.0)[1]
+        throttle, allowed = self.allow(1010.0)
+        assert not allowed
+        # one unit left, so the first request must leave the window
+        assert throttle.wait() == pytest.approx(50.0)
+
+    def test_cost_above_limit_is_never_allowed(self):
+        self.settings.THROTTLE_COSTS = {"login": 4}
+        throttle, allowed = self.allow()
+        assert not allowed
+        assert throttle.wait() == 60
+
+    def test_redis_runs_one_script_per_check(self):
+        # the throttle keeps DRF's default cache (the proxy); only the
+        # configured backend is Redis
+        self.settings.CACHES = {
+            "default": {
+                "BACKEND": "django_redis.cache.RedisCache",
+                "LOCATION": "redis://localhost:6379/0",
+                "KEY_PREFIX": "blog",
+            }
+        }
+        client = mock.Mock()
+        script = client.register_script.return_value
+        script.side_effect = [-1, 2_500_000]
+
+        with mock.patch.object(
+            caches["default"].client, "get_client", return_value=client
+        ), mock.patch.object(SlidingWindowThrottleMixin, "script", None):
+            assert self.allow()[1]
+            throttle, allowed = self.allow()
+
+        assert not allowed
+        assert throttle.wait() == 2.5
+        client.register_script.assert_called_once()
+        kwargs = script.call_args.kwargs
+        assert kwargs["keys"] == ["blog:1:throttle_login_10.0.0.1"]
+        assert kwargs["args"][:3] == [3, 60_000_000, 1]
+
+    @pytest.fixture
+    def redis_cache(self):
+        self.settings.CACHES = self.redis_caches
+        backend = caches["default"]
+        try:
+            backend.client.get_client(write=True).ping()
+        except (AttributeError, ConnectionError):
+            pytest.skip("the configured cache is not a reachable Redis")
+        backend.delete("throttle_login_10.0.0.1")
+        with mock.patch.object(SlidingWindowThrottleMixin, "script", None):
+            yield
+        backend.delete("throttle_login_10.0.0.1")
+
+    @pytest.mark.parametrize("cost, allowed", [(1, 3), (2, 1)])
+    def test_redis_script_uses_server_time(self, redis_cache, cost, allowed):
+        self.settings.THROTTLE_COSTS = {"login": cost}
+        # a local clock far in the past must not matter: Redis TIME is used
+        results = [self.allow(now=0.0) for _ in range(allowed + 1)]
+
+        assert [result[1] for result in results] == [True] * allowed + [False]
+        # the oldest unit was consumed just now, by the server's clock
+        assert 59.0 < results[-1][0].wait() <= 60.0
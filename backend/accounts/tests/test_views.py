@@ -8,7 +8,9 @@ from rest_framework.test import APIClient
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from accounts.mail import flush_outbox
 from accounts.models import User
+from accounts.tasks import send_activation_email, send_templated_email
 
 
 @pytest.mark.django_db
@@ -19,20 +21,50 @@ class TestSendTokenActivationRegisterView:
         self.client = APIClient()
         self.url = reverse("accounts:api-v1:token-register")
 
-    def test_register_user_success_and_email_sent(self):
+    def test_register_user_success_and_email_sent(self, mailoutbox):
         data = {
             "email": "testuser@example.com",
             "password": "StrongPassword123!",
             "password2": "StrongPassword123!",
         }
 
-        with patch("mail_templated.EmailMessage.send") as mock_send:
+        # run the email tasks inline instead of sending them to a broker
+        with patch(
+            "accounts.tasks.send_activation_email.delay", side_effect=send_activation_email
+        ), patch(
+            "accounts.tasks.send_templated_email.delay", side_effect=send_templated_email
+        ), patch("accounts.mail.schedule_flush"):
             response = self.client.post(self.url, data, format="json")
+        flush_outbox()
 
-            assert response.status_code == 201
-            assert response.data["email"] == data["email"]
-            assert User.objects.filter(email=data["email"]).exists()
-            mock_send.assert_called_once()
+        assert response.status_code == 201
+        assert response.data["email"] == data["email"]
+        assert User.objects.filter(email=data["email"]).exists()
+        # token email and templated activation email, flushed from the outbox
+        assert [m.subject.strip() for m in mailoutbox] == [
+            "Your Access Token",
+            "Account Activations",
+        ]
+
+    def test_register_only_queues_emails(self, mailoutbox):
+        data = {
+            "email": "queued@example.com",
+            "password": "StrongPassword123!",
+            "password2": "StrongPassword123!",
+        }
+
+        with patch("accounts.tasks.send_activation_email.delay") as token_email, patch(
+            "accounts.tasks.send_templated_email.delay"
+        ) as templated_email:
+            response = self.client.post(self.url, data, format="json")
+
+        assert response.status_code == 201
+        assert mailoutbox == []
+        token_email.assert_called_once()
+        template_name, context, _, recipients = templated_email.call_args.args
+        assert template_name == "email/activation_email.tpl"
+        assert recipients == ["queued@example.com"]
+        assert "token" in context
 
     def test_register_user_passwords_do_not_match(self):
         data = {
@@ -52,8 +84,8 @@ class TestSendTokenActivationRegisterView:
 
         data = {
             "email": "duplicate@example.com",
-            "password": "Password1",
-            "password2": "Password1",
+            "password": "StrongPassword123!",
+            "password2": "StrongPassword123!",
         }
         response = self.client.post(self.url, data, format="json")
 
@@ -97,6 +129,37 @@ class TestRegisterView:
         assert response.status_code == 400
         assert "password" in response.data
 
+    def test_register_inserts_user_profile_and_token_only(self, django_assert_num_queries):
+        from rest_framework.authtoken.models import Token
+
+        data = {
+            "email": "newuser@example.com",
+            "password": "strong_password123",
+            "password2": "strong_password123",
+        }
+        # SAVEPOINT, user, profile and token INSERTs, RELEASE SAVEPOINT
+        with django_assert_num_queries(5):
+            response = self.client.post(self.url, data, format="json")
+        assert response.status_code == 201
+        user = User.objects.get(email=data["email"])
+        assert user.profile.pk
+        assert Token.objects.filter(user=user).exists()
+
+    def test_register_duplicate_email_rolls_back(self):
+        from rest_framework.authtoken.models import Token
+
+        User.objects.create_user(email="taken@example.com", password="pass")
+        data = {
+            "email": "taken@example.com",
+            "password": "strong_password123",
+            "password2": "strong_password123",
+        }
+        response = self.client.post(self.url, data, format="json")
+        assert response.status_code == 400
+        assert response.data["email"] == ["Email already registered"]
+        assert User.objects.filter(email="taken@example.com").count() == 1
+        assert not Token.objects.exists()
+
 
 @pytest.mark.django_db
 class TestCustomObtainToken(APITestCase):
@@ -198,3 +261,272 @@ class TestActivationApiView:
         response = self.client.get(url)
         assert response.status_code == 400
         assert "expired" in response.data["detail"].lower()
+
+    def activation_url(self, user):
+        from accounts.api.v1.serializers import CustomObtainPairSerializer
+
+        token = CustomObtainPairSerializer.get_token(user).access_token
+        return reverse("accounts:api-v1:activation-confirm", kwargs={"token": str(token)})
+
+    def test_activation_is_one_update_and_queues_email(
+        self, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        url = self.activation_url(self.user)
+        with patch(
+            "accounts.tasks.send_activation_confirmation_email.delay"
+        ) as confirmation, django_capture_on_commit_callbacks(execute=True):
+            with django_assert_num_queries(1):
+                response = self.client.get(url)
+
+        assert response.status_code == 200
+        confirmation.assert_called_once_with("active@example.com", "active@example.com")
+        self.user.refresh_from_db()
+        assert self.user.is_verified is True
+
+    def test_repeated_activation_is_idempotent(self, django_capture_on_commit_callbacks):
+        url = self.activation_url(self.user)
+        with patch(
+            "accounts.tasks.send_activation_confirmation_email.delay"
+        ) as confirmation, django_capture_on_commit_callbacks(execute=True):
+            first = self.client.get(url)
+            second = self.client.get(url)
+
+        assert first.status_code == second.status_code == 200
+        assert first.data == second.data
+        confirmation.assert_called_once()
+
+    def test_activation_of_unknown_user(self):
+        token = jwt.encode(
+            {"user_id": self.user.id + 1000, "exp": 2**32},
+            settings.SECRET_KEY,
+            algorithm="HS256",
+        )
+        url = reverse("accounts:api-v1:activation-confirm", kwargs={"token": token})
+        response = self.client.get(url)
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestGetUserAPIView:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.client = APIClient()
+        self.url = reverse("accounts:api-v1:get-user")
+        self.user = User.objects.create_user(email="me@example.com", password="StrongPass123")
+
+    def test_answers_from_token_claims_without_queries(self, django_assert_num_queries):
+        response = self.client.post(
+            reverse("accounts:api-v1:jwt-create"),
+            {"email": "me@example.com", "password": "StrongPass123"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+        with django_assert_num_queries(0):
+            response = self.client.get(self.url)
+
+        assert response.status_code == 200
+        assert response.data == {"id": self.user.id, "email": "me@example.com"}
+
+    def test_token_without_email_claim_falls_back_to_database(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        response = self.client.get(self.url)
+
+        assert response.data["email"] == "me@example.com"
+
+
+@pytest.mark.django_db
+class TestProfileDetail:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, django_capture_on_commit_callbacks):
+        self.capture = django_capture_on_commit_callbacks
+        self.user = User.objects.create_user(email="profile@example.com", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("accounts:api-v1:profile-detail")
+
+    def test_cached_profile_costs_no_query(self, django_assert_num_queries):
+        self.client.get(self.url)
+        with django_assert_num_queries(0):
+            response = self.client.get(self.url)
+        assert response.status_code == 200
+        assert response.data["user"] == self.user.id
+
+    def test_put_invalidates_cached_profile(self):
+        assert self.client.get(self.url).data["first_name"] == ""
+
+        with self.capture(execute=True):
+            response = self.client.put(
+                self.url,
+                {"first_name": "Ada", "last_name": "Lovelace", "description": "hi"},
+                format="json",
+            )
+        assert response.status_code == 200
+
+        assert self.client.get(self.url).data["first_name"] == "Ada"
+        profile_url = reverse("accounts:api-v1:profile")
+        assert self.client.get(profile_url).data["first_name"] == "Ada"
+
+    def test_generated_variants_invalidate_cached_profile(self, settings, tmp_path):
+        from io import BytesIO
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from PIL import Image
+        from accounts.models import Profile
+        from blog.tasks import generate_image_variants
+
+        settings.MEDIA_ROOT = tmp_path
+        buffer = BytesIO()
+        Image.new("RGB", (800, 400), "red").save(buffer, "PNG")
+        name = default_storage.save("avatar.png", ContentFile(buffer.getvalue()))
+        Profile.objects.filter(user=self.user).update(image=name)
+        assert self.client.get(self.url).data["image_variants"] == {}
+
+        generate_image_variants("accounts", "profile", self.user.profile.pk, "image", name)
+
+        assert self.client.get(self.url).data["image_variants"]["source"] == name
+
+
+@pytest.mark.django_db
+class TestAsyncAuthViews:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.client = APIClient()
+
+    def test_register_then_login(self):
+        from rest_framework.authtoken.models import Token
+
+        response = self.client.post(
+            reverse("accounts:api-v1:async-register"),
+            {
+                "email": "async@example.com",
+                "password": "StrongPass123",
+                "password2": "StrongPass123",
+            },
+            format="json",
+        )
+        assert response.status_code == 201
+        user = User.objects.get(email="async@example.com")
+        assert user.check_password("StrongPass123")
+        assert Token.objects.filter(user=user).exists()
+
+        response = self.client.post(
+            reverse("accounts:api-v1:async-jwt-create"),
+            {"email": "async@example.com", "password": "StrongPass123"},
+            format="json",
+        )
+        assert response.status_code == 200
+        assert response.json()["user_id"] == user.id
+
+    def test_register_duplicate_email(self):
+        User.objects.create_user(email="async@example.com", password="StrongPass123")
+        response = self.client.post(
+            reverse("accounts:api-v1:async-register"),
+            {
+                "email": "async@example.com",
+                "password": "StrongPass123",
+                "password2": "StrongPass123",
+            },
+            format="json",
+        )
+        assert response.status_code == 400
+        assert "email" in response.json()
+
+    def test_register_validation_errors(self):
+        response = self.client.post(
+            reverse("accounts:api-v1:async-register"),
+            {
+                "email": "async@example.com",
+                "password": "StrongPass123",
+                "password2": "other",
+            },
+            format="json",
+        )
+        assert response.status_code == 400
+        assert "password2" in response.json()
+
+    def test_login_with_wrong_password(self):
+        User.objects.create_user(email="async2@example.com", password="StrongPass123")
+        response = self.client.post(
+            reverse("accounts:api-v1:async-jwt-create"),
+            {"email": "async2@example.com", "password": "wrong"},
+            format="json",
+        )
+        assert response.status_code == 401
+
+
+@pytest.mark.django_db
+class TestLoginLockout:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.LOGIN_LOCKOUT_ACCOUNT_THRESHOLD = 2
+        settings.LOGIN_LOCKOUT_BASE_DELAY = 60
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="locked@example.com", password="StrongPass123")
+
+    def login(self, url_name, password):
+        return self.client.post(
+            reverse(url_name),
+            {"email": "locked@example.com", "password": password},
+            format="json",
+        )
+
+    def test_locked_account_is_rejected_before_hashing(self):
+        assert self.login("accounts:api-v1:custom-token", "wrong").status_code == 400
+        assert self.login("accounts:api-v1:custom-token", "wrong").status_code == 400
+
+        with patch("accounts.api.v1.serializers.authenticate") as mock_authenticate:
+            response = self.login("accounts:api-v1:custom-token", "StrongPass123")
+
+        assert response.status_code == 429
+        assert int(response["Retry-After"]) > 0
+        mock_authenticate.assert_not_called()
+
+    def test_lockout_applies_to_jwt_login(self):
+        self.login("accounts:api-v1:jwt-custom", "wrong")
+        self.login("accounts:api-v1:jwt-custom", "wrong")
+
+        assert self.login("accounts:api-v1:jwt-custom", "StrongPass123").status_code == 429
+
+    def test_successful_login_resets_failures(self):
+        self.login("accounts:api-v1:custom-token", "wrong")
+        assert self.login("accounts:api-v1:custom-token", "StrongPass123").status_code == 200
+        self.login("accounts:api-v1:custom-token", "wrong")
+
+        assert self.login("accounts:api-v1:custom-token", "StrongPass123").status_code == 200
+
+    def test_per_ip_lockout_covers_other_accounts(self, settings):
+        settings.LOGIN_LOCKOUT_IP_THRESHOLD = 2
+        for email in ("a@example.com", "b@example.com"):
+            self.client.post(
+                reverse("accounts:api-v1:custom-token"),
+                {"email": email, "password": "wrong"},
+                format="json",
+            )
+
+        assert self.login("accounts:api-v1:custom-token", "StrongPass123").status_code == 429
+
+    def test_spoofed_forwarded_for_does_not_evade_ip_lockout(self, settings):
+        settings.LOGIN_LOCKOUT_IP_THRESHOLD = 2
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}
+        for spoofed, email in (("1.1.1.1", "a@example.com"), ("2.2.2.2", "b@example.com")):
+            self.client.post(
+                reverse("accounts:api-v1:custom-token"),
+                {"email": email, "password": "wrong"},
+                format="json",
+                headers={"X-Forwarded-For": f"{spoofed}, 10.0.0.1"},
+            )
+
+        response = self.client.post(
+            reverse("accounts:api-v1:custom-token"),
+            {"email": "locked@example.com", "password": "StrongPass123"},
+            format="json",
+            headers={"X-Forwarded-For": "3.3.3.3, 10.0.0.1"},
+        )
+        assert response.status_code == 429
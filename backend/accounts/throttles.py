@@ -1,9 +1,150 @@
-from rest_framework.throttling import AnonRateThrottle
+import uuid
 
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.utils.connection import ConnectionProxy
+from django_redis.cache import RedisCache
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
-class LoginThrottle(AnonRateThrottle):
+# Sliding window check-and-consume, run atomically inside Redis.
+#
+# KEYS[1]  sorted set of consumed units, scored by time in microseconds
+# ARGV[1]  limit (units per window)
+# ARGV[2]  window in microseconds
+# ARGV[3]  cost of this request in units
+# ARGV[4]  unique request id used as member prefix
+#
+# Returns -1 when the request is allowed, else the microseconds until
+# enough units leave the window for it to be allowed.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local member = ARGV[4]
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000000 + tonumber(time[2])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+
+local used = redis.call('ZCARD', key)
+if used + cost > limit then
+    if cost > limit then
+        return window
+    end
+    local index = used + cost - limit - 1
+    local entry = redis.call('ZRANGE', key, index, index, 'WITHSCORES')
+    return tonumber(entry[2]) + window - now
+end
+
+for i = 1, cost do
+    redis.call('ZADD', key, now, member .. ':' .. i)
+end
+redis.call('PEXPIRE', key, math.ceil(window / 1000))
+return -1
+"""
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Sliding window rate limiting that is exact under concurrency.
+
+    DRF's `SimpleRateThrottle` reads a list of timestamps from the cache,
+    trims it and writes it back, so concurrent workers overwrite each
+    other's requests and every check moves the whole list. With the
+    `django_redis` cache the window is a sorted set instead, trimmed,
+    counted and appended to by a single Lua script: one round trip per
+    check and no lost updates.
+
+    Every request consumes `get_cost()` units of the scope's rate, taken
+    from `THROTTLE_COSTS` (scopes not listed there cost 1). Other cache
+    backends, e.g. in tests, fall back to the timestamp list with the same
+    cost semantics.
+    """
+
+    script = None
+    wait_seconds = None
+
+    def get_cost(self, request, view):
+        return settings.THROTTLE_COSTS.get(self.scope, 1)
+
+    def get_cache_backend(self):
+        """
+        Return the backend instance behind `self.cache`.
+
+        DRF's default is `django.core.cache.cache`, a proxy to the default
+        alias, which is never an instance of the backend class itself.
+        """
+        if isinstance(self.cache, ConnectionProxy):
+            return caches[DEFAULT_CACHE_ALIAS]
+        return self.cache
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cost = self.get_cost(request, view)
+        backend = self.get_cache_backend()
+        if isinstance(backend, RedisCache):
+            wait = self.consume_redis(backend, cost)
+        else:
+            wait = self.consume_cache(cost)
+        if wait is None:
+            return True
+        self.wait_seconds = wait
+        return False
+
+    def consume_redis(self, backend, cost):
+        """Run the sliding window script; return the wait in seconds or None."""
+        client = backend.client.get_client(write=True)
+        if SlidingWindowThrottleMixin.script is None:
+            SlidingWindowThrottleMixin.script = client.register_script(
+                SLIDING_WINDOW_SCRIPT
+            )
+        wait = self.script(
+            keys=[backend.make_key(self.key)],
+            args=[self.num_requests, self.duration * 1_000_000, cost, uuid.uuid4().hex],
+            client=client,
+        )
+        return None if wait < 0 else wait / 1_000_000
+
+    def consume_cache(self, cost):
+        """Timestamp list fallback for caches without sorted sets."""
+        self.history = self.cache.get(self.key, [])
+        self.now = self.timer()
+        while self.history and self.history[-1] <= self.now - self.duration:
+            self.history.pop()
+
+        used = len(self.history)
+        if used + cost > self.num_requests:
+            if cost > self.num_requests:
+                return self.duration
+            # history is newest first; this is the unit whose expiry frees enough room
+            return self.history[self.num_requests - cost] + self.duration - self.now
+
+        self.history[:0] = [self.now] * cost
+        self.cache.set(self.key, self.history, self.duration)
+        return None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SlidingWindowAnonRateThrottle(SlidingWindowThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class SlidingWindowUserRateThrottle(SlidingWindowThrottleMixin, UserRateThrottle):
+    pass
+
+
+class LoginThrottle(SlidingWindowAnonRateThrottle):
     scope = "login"
 
 
-class RegisterThrottle(AnonRateThrottle):
+class RegisterThrottle(SlidingWindowAnonRateThrottle):
     scope = "register"
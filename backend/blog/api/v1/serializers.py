@@ -1,6 +1,10 @@
+import os
+
+from django.conf import settings
 from rest_framework import serializers
 
-from blog.models import Post, Category, Comments, PostImages
+from blog.models import Post, Category, Comments, PostImages, UploadSession
+from blog.images import UPLOAD_EXTENSIONS, build_srcset
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -36,6 +40,10 @@ class PostSerializer(serializers.ModelSerializer):
     - Automatic mapping of all model fields via ModelSerializer.
     - Setting the 'auther' field to the currently authenticated user during creation.
     - Custom representation of the 'category' field using a nested CategorySerializer.
+    - Exposing background-generated image variants as `image_variants` and
+      `srcset`-ready strings as `image_srcset`.
+    - Exposing the image's precomputed width, height, byte size, dominant
+      color and blurhash so clients can lay it out before it loads.
 
     Meta:
         model: Post
@@ -61,6 +69,7 @@ class PostSerializer(serializers.ModelSerializer):
     snippet = serializers.ReadOnlyField(source="get_snippet")
     relative_url = serializers.URLField(source="get_absolute_api_url", read_only=True)
     absolute_url = serializers.SerializerMethodField(source="get_absolute_url")
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -75,8 +84,23 @@ class PostSerializer(serializers.ModelSerializer):
             "relative_url",
             "absolute_url",
             "image",
+            "image_variants",
+            "image_srcset",
+            "image_width",
+            "image_height",
+            "image_size",
+            "image_color",
+            "image_blurhash",
         ]
-        read_only_fields = ("auther",)
+        read_only_fields = (
+            "auther",
+            "image_variants",
+            "image_width",
+            "image_height",
+            "image_size",
+            "image_color",
+            "image_blurhash",
+        )
 
     def create(self, validated_data):
         request = self.context.get("request")
@@ -99,6 +123,9 @@ class PostSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         return request.build_absolute_uri(instance.pk)
 
+    def get_image_srcset(self, instance):
+        return build_srcset(instance.image_variants, self.context.get("request"))
+
 
 class CommentSerializer(serializers.ModelSerializer):
     """
@@ -211,16 +238,70 @@ class PostImagesSerializers(serializers.ModelSerializer):
     Serializes all fields of the PostImages model while preventing direct
     modification of the associated post. The `post` field is read-only and
     is intended to be assigned automatically by the corresponding view.
+    `image_variants` and `image_srcset` expose the resized copies generated
+    in the background after upload, and the `image_*` metadata fields the
+    image's dimensions, byte size, dominant color and blurhash.
     """
+    image_srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = PostImages
         fields = "__all__"
-        read_only_fields = ("post",)
+        read_only_fields = ("post", "image_variants")
+
+    def get_image_srcset(self, instance):
+        return build_srcset(instance.image_variants, self.context.get("request"))
+
+
+class PostImagesBatchSerializer(serializers.Serializer):
+    """
+    Serializer for uploading several gallery images in one request.
+
+    Accepts repeated `images` parts of a multipart body, each validated as an
+    image, up to `POST_IMAGE_BATCH_MAX_FILES` files per request.
+    """
 
+    images = serializers.ListField(
+        child=serializers.ImageField(),
+        allow_empty=False,
+        max_length=settings.POST_IMAGE_BATCH_MAX_FILES,
+    )
 
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for resumable chunked upload sessions.
 
+    The client declares the target post, where the image goes (`post` for
+    the post's main image, `gallery` for a new `PostImages` row), the file
+    name and the total size. `offset` reports how many bytes the server
+    has received so far and is where the next chunk must start.
+    """
+
+    class Meta:
+        model = UploadSession
+        fields = ["id", "post", "target", "filename", "size", "offset", "created_at"]
+        read_only_fields = ("id", "offset", "created_at")
+
+    def validate_post(self, value):
+        if value.auther_id != self.context["request"].user.pk:
+            raise serializers.ValidationError("You can only upload to your own posts.")
+        return value
+
+    def validate_filename(self, value):
+        extension = os.path.splitext(value)[1].lower().lstrip(".")
+        if extension not in UPLOAD_EXTENSIONS.values() and extension != "jpeg":
+            raise serializers.ValidationError(
+                "File must be a JPEG, PNG, GIF or WebP image."
+            )
+        return value
 
+    def validate_size(self, value):
+        if not 0 < value <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Size must be between 1 and {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes."
+            )
+        return value
 
 
 class SearchPostSerializer(serializers.Serializer):
@@ -232,4 +313,40 @@ class SearchPostSerializer(serializers.Serializer):
     """
     
     id = serializers.IntegerField()
-    title = serializers.CharField()
\ No newline at end of file
+    title = serializers.CharField()
+
+
+class SearchBatchQuerySerializer(serializers.Serializer):
+    """
+    A single query spec inside a batch search request.
+
+    The client-provided `id` is echoed back as the key of its results.
+    """
+
+    id = serializers.CharField(max_length=64)
+    q = serializers.CharField(max_length=255)
+    category = serializers.IntegerField(required=False)
+    page = serializers.IntegerField(min_value=1, default=1)
+
+
+class SearchBatchSerializer(serializers.Serializer):
+    """
+    Serializer for batch search requests.
+
+    Validates that the batch is not empty, does not exceed
+    `SEARCH_BATCH_MAX_QUERIES` specs and that every spec id is unique.
+    """
+
+    queries = SearchBatchQuerySerializer(many=True)
+
+    def validate_queries(self, value):
+        if not value:
+            raise serializers.ValidationError("At least one query is required.")
+        if len(value) > settings.SEARCH_BATCH_MAX_QUERIES:
+            raise serializers.ValidationError(
+                f"At most {settings.SEARCH_BATCH_MAX_QUERIES} queries are allowed."
+            )
+        ids = [spec["id"] for spec in value]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Query ids must be unique.")
+        return value
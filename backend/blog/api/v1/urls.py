@@ -21,6 +21,25 @@ urlpatterns = [
     path("user/post/", UserPostListApiView.as_view(), name="user-posts"),
     path("post/list/cache/", PostListCacheAPIView.as_view(), name="post-cache"),
     path("img/post/<int:pk>/", PostImageCreateAndListAPIView.as_view(), name="img_post"),
+    path(
+        "img/post/<int:pk>/batch/",
+        PostImageBatchUploadAPIView.as_view(),
+        name="img_post_batch",
+    ),
+    path("upload/sessions/", UploadSessionCreateAPIView.as_view(), name="upload-session-create"),
+    path(
+        "upload/sessions/<uuid:pk>/",
+        UploadSessionDetailAPIView.as_view(),
+        name="upload-session-detail",
+    ),
+    path(
+        "upload/sessions/<uuid:pk>/complete/",
+        UploadSessionCompleteAPIView.as_view(),
+        name="upload-session-complete",
+    ),
     path('search/',SearchPostApiView.as_view(),name='search'),
+    path("search/batch/", SearchBatchApiView.as_view(), name="search-batch"),
+    path("search/suggest/", SuggestPostApiView.as_view(), name="search-suggest"),
+    path("search/cache/stats/", SearchCacheStatsApiView.as_view(), name="search-cache-stats"),
     path("", include(router.urls)),
 ]
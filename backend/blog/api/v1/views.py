@@ -11,7 +11,27 @@ from .paginations import DefaultPagination
 from django.core.cache import cache
 import random
 from django.shortcuts import get_object_or_404
-from documents import PostDocument
+from django.conf import settings
+import os
+from django.core.files import File
+from PIL import Image, UnidentifiedImageError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from blog.images import UPLOAD_EXTENSIONS, schedule_image_variants
+from blog.search_backends import get_search_backend
+from blog.search import (
+    make_search_cache_key,
+    get_cached_results,
+    get_many_cached_results,
+    set_cached_results,
+    set_many_cached_results,
+    get_search_cache_stats,
+)
 
 class PostListView(GenericAPIView):
     """
@@ -503,7 +523,7 @@ class PostImageCreateAndListAPIView(GenericAPIView):
     serializer_class = PostImagesSerializers
 
     def get(self, request, pk):
-        post = get_object_or_404(Post, pk=pk, author=request.user)
+        post = get_object_or_404(Post, pk=pk, auther=request.user)
         images = PostImages.objects.filter(post=post)
         serializer = self.serializer_class(instance=images, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -519,49 +539,502 @@ class PostImageCreateAndListAPIView(GenericAPIView):
         else:
             return Response(serializers.errors, status=status.HTTP_404_NOT_FOUND)
 
+
+class PostImageBatchUploadAPIView(GenericAPIView):
+    """
+    Upload many gallery images for a post in a single request.
+
+    Authentication and the post ownership check run once for the whole
+    batch, and all `PostImages` rows are written with one `bulk_create`.
+
+    Request Content-Type:
+        multipart/form-data with one or more `images` parts
+        (at most `POST_IMAGE_BATCH_MAX_FILES`).
+
+    Memory:
+        Every part is streamed to a temporary file on disk while the body
+        is parsed, and from there into storage, so the request body is
+        never held in memory as a whole.
+
+    Success Responses:
+        201 CREATED
+        {
+            "msg": "images successfully added",
+            "images": [{"id": 1, "images": "...", ...}]
+        }
+
+    Error Responses:
+        400 BAD REQUEST: Missing, invalid or too many files.
+        404 NOT FOUND: The post does not exist or is not owned by the user.
+    """
+
+    serializer_class = PostImagesBatchSerializer
+    parser_classes = (MultiPartParser,)
+    permission_classes = (IsAuthenticated,)
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def post(self, request, pk):
+        post = get_object_or_404(Post.objects.only("id"), pk=pk, auther=request.user)
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            images = PostImages.objects.bulk_create(
+                [
+                    PostImages(post=post, images=upload)
+                    for upload in serializer.validated_data["images"]
+                ]
+            )
+            # bulk_create skips post_save, so queue the variants explicitly.
+            for image in images:
+                schedule_image_variants(image, "images")
+
+        data = PostImagesSerializers(
+            instance=images, many=True, context={"request": request}
+        ).data
+        return Response(
+            {"msg": "images successfully added", "images": data},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class UploadSessionCreateAPIView(GenericAPIView):
+    """
+    Start a resumable, chunked image upload.
+
+    Request Body:
+        {
+            "post": 1,
+            "target": "gallery",   # or "post" for the post's main image
+            "filename": "photo.jpg",
+            "size": 7340032
+        }
+
+    Success Responses:
+        201 CREATED: The session, including its `id` and `offset` (0).
+
+    Error Responses:
+        400 BAD REQUEST: Unknown post, someone else's post or invalid size.
+
+    Flow:
+        1. POST here to create the session.
+        2. PUT raw chunks to `upload/sessions/<id>/` with an `Upload-Offset`
+           header; GET the same URL to learn the offset to resume from.
+        3. POST `upload/sessions/<id>/complete/` once every byte is sent.
+    """
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data, context={"request": request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        session = serializer.save(user=request.user)
+        os.makedirs(settings.CHUNKED_UPLOAD_TEMP_DIR, exist_ok=True)
+        open(session.temp_path, "wb").close()
+        return Response(self.serializer_class(session).data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailAPIView(GenericAPIView):
+    """
+    Inspect an upload session or append a chunk to it.
+
+    get:
+    Return the session; `offset` is where the next chunk must start, which
+    lets a client resume after a dropped connection.
+
+    put:
+    Append the raw request body at the position given by the
+    `Upload-Offset` header. The body is streamed to the session's temp file
+    in small blocks, so a chunk is never held in memory as a whole.
+
+    Headers:
+        Upload-Offset (int): Must equal the session's current `offset`.
+
+    Success Responses:
+        200 OK: The session with its new `offset`.
+
+    Error Responses:
+        400 BAD REQUEST: Missing offset header or chunk past the declared size.
+        404 NOT FOUND: No such session for the current user.
+        409 CONFLICT: The offset does not match, or another chunk is still
+        being received for it; the body has the server's offset to resume from.
+    """
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = (IsAuthenticated,)
+    read_block_size = 64 * 1024
+
+    def get(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+        return Response(self.serializer_class(session).data, status=status.HTTP_200_OK)
+
+    def put(self, request, pk):
+        try:
+            offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Upload-Offset header is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Reserve the offset with one conditional UPDATE instead of holding a
+        # row lock while the body streams in from a possibly slow client; a
+        # retry of the same offset meanwhile gets a 409 right away.
+        started_at = timezone.now()
+        stale = started_at - settings.CHUNKED_UPLOAD_CHUNK_TIMEOUT
+        sessions = UploadSession.objects.filter(pk=pk, user=request.user)
+        reserved = (
+            sessions.filter(offset=offset)
+            .filter(Q(chunk_started_at__isnull=True) | Q(chunk_started_at__lt=stale))
+            .update(chunk_started_at=started_at)
+        )
+        session = get_object_or_404(sessions)
+        if not reserved:
+            return self.conflict(session)
+
+        reservation = sessions.filter(offset=offset, chunk_started_at=started_at)
+        try:
+            written = self.write_chunk(request.stream, session, offset)
+        except BaseException:
+            reservation.update(chunk_started_at=None)
+            raise
+        if written is None:
+            reservation.update(chunk_started_at=None)
+            return Response(
+                {"detail": "chunk exceeds the declared size"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # only succeeds while the reservation is still this request's
+        session.offset = offset + written
+        session.updated_at = timezone.now()
+        if not reservation.update(
+            offset=session.offset, chunk_started_at=None, updated_at=session.updated_at
+        ):
+            session.refresh_from_db()
+            return self.conflict(session)
+        return Response(self.serializer_class(session).data, status=status.HTTP_200_OK)
+
+    def conflict(self, session):
+        detail = "chunk in progress" if session.chunk_started_at else "offset mismatch"
+        return Response(
+            {"detail": detail, "offset": session.offset},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    def write_chunk(self, stream, session, offset):
+        """
+        Stream the request body into the temp file at ``offset``.
+
+        Returns:
+            int | None: The number of bytes written, or None (and nothing
+            kept) when the chunk runs past the session's declared size.
+        """
+        written = 0
+        with open(session.temp_path, "r+b") as fh:
+            fh.seek(offset)
+            while stream is not None:
+                block = stream.read(self.read_block_size)
+                if not block:
+                    break
+                written += len(block)
+                if offset + written > session.size:
+                    fh.truncate(offset)
+                    return None
+                fh.write(block)
+        return written
+
+
+class UploadSessionCompleteAPIView(GenericAPIView):
+    """
+    Finish an upload session and attach the assembled image.
+
+    The temp file is validated as an image and then stored either as the
+    post's main image (`target=post`) or as a new gallery `PostImages` row
+    (`target=gallery`), named after the declared file name with the
+    extension of the detected format (JPEG, PNG, GIF or WebP). The session
+    and its temp file are removed.
+
+    Success Responses:
+        201 CREATED: The updated post or the new gallery image.
+
+    Error Responses:
+        400 BAD REQUEST: Bytes are still missing or the file is not a
+            supported image.
+        404 NOT FOUND: No such session for the current user.
+        409 CONFLICT: The session is already being completed by another
+            request.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, pk):
+        session = get_object_or_404(
+            UploadSession.objects.select_related("post"), pk=pk, user=request.user
+        )
+        if not session.is_complete:
+            return Response(
+                {"detail": "upload is incomplete", "offset": session.offset},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Claim the session with the same conditional UPDATE the chunk
+        # endpoint reserves offsets with, so a concurrent complete of the
+        # same session gets a 409 instead of attaching the image twice.
+        claimed_at = timezone.now()
+        stale = claimed_at - settings.CHUNKED_UPLOAD_CHUNK_TIMEOUT
+        claimed = (
+            UploadSession.objects.filter(pk=session.pk, offset=session.size)
+            .filter(Q(chunk_started_at__isnull=True) | Q(chunk_started_at__lt=stale))
+            .update(chunk_started_at=claimed_at)
+        )
+        if not claimed:
+            return self.conflict()
+        claim = UploadSession.objects.filter(pk=session.pk, chunk_started_at=claimed_at)
+        try:
+            response = self.attach_image(request, session, claim)
+        except BaseException:
+            claim.update(chunk_started_at=None)
+            raise
+        if response.status_code != status.HTTP_201_CREATED:
+            claim.update(chunk_started_at=None)
+            return response
+        try:
+            os.remove(session.temp_path)
+        except FileNotFoundError:
+            pass
+        return response
+
+    def conflict(self):
+        return Response(
+            {"detail": "upload is already being completed"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    def attach_image(self, request, session, claim):
+        """Validate the temp file and attach it; ``claim`` is deleted with it."""
+        try:
+            with Image.open(session.temp_path) as image:
+                image.verify()
+                extension = UPLOAD_EXTENSIONS.get(image.format)
+        except (UnidentifiedImageError, OSError):
+            extension = None
+        if extension is None:
+            return Response(
+                {"detail": "uploaded file is not a valid image"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # The stored extension decides the Content-Type media is served
+        # with, so it comes from the decoded format, not the client's name.
+        filename = f"{os.path.splitext(session.filename)[0]}.{extension}"
+        with open(session.temp_path, "rb") as fh, transaction.atomic():
+            if session.target == UploadSession.TARGET_POST:
+                instance = session.post
+                instance.image.save(filename, File(fh), save=True)
+                data = PostSerializer(instance, context={"request": request}).data
+            else:
+                instance = PostImages(post=session.post)
+                instance.images.save(filename, File(fh), save=True)
+                data = PostImagesSerializers(instance, context={"request": request}).data
+            # an expired claim may have been taken over in the meantime
+            deleted, _ = claim.delete()
+            if not deleted:
+                transaction.set_rollback(True)
+                return self.conflict()
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
 class SearchPostApiView(GenericAPIView):
     """
-    Search posts using Elasticsearch.
+    Search posts using the configured search backend.
 
     This endpoint performs a full-text search on the indexed `Post` documents
-    based on the `title` field. It utilizes Elasticsearch's `multi_match`
-    query with automatic fuzzy matching to handle misspellings and partial
-    user input.
+    based on the `title` field. With the default Elasticsearch backend it
+    utilizes a `multi_match` query with automatic fuzzy matching to handle
+    misspellings and partial user input; the in-memory backend uses trigram
+    similarity for the same purpose (see `SEARCH_BACKEND`).
 
     Query Parameters:
         q (str): Search keyword.
+        category (int): Optional category id to filter on.
+        page (int): Result page, `SEARCH_PAGE_SIZE` hits per page.
 
     Returns:
         200 OK:
             A list of matching posts containing their `id` and `title`.
 
+    Cache:
+        Results are cached in Redis for `SEARCH_CACHE_TIMEOUT` seconds,
+        keyed by the normalized query, filters and page. The key embeds a
+        generation counter that is bumped whenever a post is saved or
+        deleted, so index updates invalidate stale results immediately.
+
     Notes:
-        - Uses Elasticsearch instead of querying the PostgreSQL database.
-        - Fuzziness is set to `AUTO` to improve search accuracy.
+        - Never queries the PostgreSQL database on the request path.
+        - Elasticsearch fuzziness is set to `AUTO` to improve search accuracy.
     """
     serializer_class = SearchPostSerializer
-    
-    
-    def get(self,request,*args,**kwargs):
-        query = request.query_params.get('q','')
-        search = PostDocument.search()
-        if query:
-            search = search.query(
-                'multi_match',
-                query = query,
-                fields = [
-                    'title'
-                ],
-                fuzziness = "AUTO"
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            return Response([], status=status.HTTP_200_OK)
+
+        filters = {}
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+            if request.query_params.get("category"):
+                filters["category"] = int(request.query_params["category"])
+        except ValueError:
+            return Response(
+                {"detail": "page and category must be integers"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            response = search.execute()
-            results = [ 
-                      {
-                          "id":hit.id,
-                          "title":hit.title
-                      }
-                      for hit in response
-                      ]
-            serializer = self.serializer_class(instance=results,many=True)
-            return Response(serializer.data,status=status.HTTP_200_OK)
-        
\ No newline at end of file
+
+        cache_key = make_search_cache_key(query, filters, page)
+        results = get_cached_results(cache_key)
+        if results is None:
+            results = get_search_backend().search(query, filters, page)
+            set_cached_results(cache_key, results)
+
+        serializer = self.serializer_class(instance=results, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class SearchBatchApiView(GenericAPIView):
+    """
+    Run several post searches in a single request.
+
+    Every spec that is not already in the search result cache is sent to
+    the search backend at once; Elasticsearch runs them as one `_msearch`
+    call, so a page that needs many result blocks pays for one round trip
+    instead of one per block.
+
+    Request Body:
+        {
+            "queries": [
+                {"id": "django", "q": "django", "category": 2},
+                {"id": "related", "q": "rest api", "page": 2}
+            ]
+        }
+
+    Returns:
+        200 OK:
+            {
+                "django": [{"id": 1, "title": "Learning Django"}],
+                "related": []
+            }
+        400 Bad Request: Invalid specs, duplicate ids or too many queries.
+    """
+
+    serializer_class = SearchBatchSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        specs = serializer.validated_data["queries"]
+        keys = {}
+        for spec in specs:
+            filters = {"category": spec["category"]} if "category" in spec else {}
+            keys[spec["id"]] = (
+                make_search_cache_key(spec["q"], filters, spec["page"]),
+                filters,
+            )
+
+        cached = get_many_cached_results([key for key, _ in keys.values()])
+        missing = [spec for spec in specs if keys[spec["id"]][0] not in cached]
+        if missing:
+            batch = get_search_backend().multi_search(
+                [(spec["q"], keys[spec["id"]][1], spec["page"]) for spec in missing]
+            )
+            fresh = {
+                keys[spec["id"]][0]: results for spec, results in zip(missing, batch)
+            }
+            set_many_cached_results(fresh)
+            cached.update(fresh)
+
+        data = {
+            spec["id"]: SearchPostSerializer(
+                instance=cached[keys[spec["id"]][0]], many=True
+            ).data
+            for spec in specs
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SuggestPostApiView(APIView):
+    """
+    Title suggestions for search-as-you-type.
+
+    With the Elasticsearch backend the typed prefix is matched against the
+    edge-ngram `title_suggest` field of `PostDocument`, which turns each
+    keystroke into a cheap term lookup instead of the fuzzy `multi_match`
+    used by `SearchPostApiView`. The in-memory backend does a prefix scan
+    over its sorted vocabulary.
+
+    Query Parameters:
+        q (str): The text typed so far.
+        size (int): Number of suggestions, capped at `SEARCH_SUGGEST_MAX_SIZE`.
+
+    Returns:
+        200 OK:
+            [
+                {"id": 1, "title": "Learning Django"}
+            ]
+
+    Performance Notes:
+        - Only the `title` field is fetched from the index.
+        - The query carries a server-side `SEARCH_SUGGEST_TIMEOUT` budget.
+        - Results are built as plain dicts, skipping the serializer.
+        - Responses share the search result cache and its invalidation.
+    """
+
+    def get(self, request, *args, **kwargs):
+        prefix = request.query_params.get("q", "")
+        if not prefix.strip():
+            return Response([], status=status.HTTP_200_OK)
+        try:
+            size = int(request.query_params.get("size", settings.SEARCH_SUGGEST_SIZE))
+        except ValueError:
+            size = settings.SEARCH_SUGGEST_SIZE
+        size = min(max(size, 1), settings.SEARCH_SUGGEST_MAX_SIZE)
+
+        cache_key = make_search_cache_key(prefix, {"suggest": size})
+        results = get_cached_results(cache_key)
+        if results is None:
+            results = get_search_backend().suggest(prefix, size)
+            set_cached_results(cache_key, results)
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class SearchCacheStatsApiView(GenericAPIView):
+    """
+    Expose hit-rate metrics of the search result cache.
+
+    Returns:
+        200 OK:
+            {
+                "hits": 120,
+                "misses": 30,
+                "hit_rate": 0.8,
+                "generation": 4,
+                "timeout": 60
+            }
+
+    Permissions:
+        Admin users only; intended for tuning `SEARCH_CACHE_TIMEOUT`.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(get_search_cache_stats(), status=status.HTTP_200_OK)
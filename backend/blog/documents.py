@@ -1,9 +1,31 @@
-from  django_elasticsearch_dsl import Document
+from  django_elasticsearch_dsl import Document, fields
 from django_elasticsearch_dsl.registries import registry
+from elasticsearch.dsl import analyzer, tokenizer
 from .models import *
 
+# Index-time analyzer that stores every 2..20 character prefix of each word,
+# so prefix lookups become plain term matches instead of fuzzy queries.
+title_autocomplete = analyzer(
+    "title_autocomplete",
+    tokenizer=tokenizer(
+        "title_edge_ngram",
+        "edge_ngram",
+        min_gram=2,
+        max_gram=20,
+        token_chars=["letter", "digit"],
+    ),
+    filter=["lowercase"],
+)
+
 @registry.register_document
 class PostDocument (Document):
+    category_id = fields.IntegerField(attr="category_id")
+    title_suggest = fields.TextField(
+        attr="title",
+        analyzer=title_autocomplete,
+        search_analyzer="standard",
+    )
+
     class Index:
         name = 'posts'
         settings = {
@@ -0,0 +1,262 @@
+import math
+import os
+from io import BytesIO
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+# Pillow format name and file extension for every variant format.
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+}
+
+# File extension stored for each Pillow format accepted as an upload.
+UPLOAD_EXTENSIONS = {
+    "JPEG": "jpg",
+    "PNG": "png",
+    "GIF": "gif",
+    "WEBP": "webp",
+}
+
+BLURHASH_CHARACTERS = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+# Side of the thumbnail the blurhash and dominant color are computed from.
+METADATA_SAMPLE_SIZE = 32
+
+
+def schedule_image_variants(instance, field_name):
+    """
+    Queue variant generation for ``instance.<field_name>`` once the current
+    transaction commits.
+
+    Nothing is queued when the field is empty or when the stored variants
+    were already generated from the current file, so saving unrelated fields
+    does not redo the work.
+    """
+    name = getattr(instance, field_name).name
+    if not name or (instance.image_variants or {}).get("source") == name:
+        return
+
+    from blog.tasks import generate_image_variants
+
+    transaction.on_commit(
+        lambda: generate_image_variants.delay(
+            instance._meta.app_label,
+            instance._meta.model_name,
+            instance.pk,
+            field_name,
+            name,
+        )
+    )
+
+
+def open_image(field_file):
+    """Decode an image field as upright RGB, applying its EXIF orientation."""
+    with field_file.open("rb") as fh:
+        image = ImageOps.exif_transpose(Image.open(fh))
+        return image.convert("RGB")
+
+
+def variant_name(source_name, width, extension):
+    """Storage name of one variant, derived from the source's (hash-based) name."""
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    return f"{settings.IMAGE_VARIANT_PATH}{stem}_{width}w.{extension}"
+
+
+def build_image_variants(field_file, original=None):
+    """
+    Render fixed-width WebP/JPEG copies of an uploaded image.
+
+    Widths come from `IMAGE_VARIANT_WIDTHS`; widths larger than the original
+    are skipped so images are never upscaled. Files are written to
+    `IMAGE_VARIANT_PATH` in the default storage under names derived from the
+    source name. A content-addressed source name stands for its bytes, so a
+    variant that already exists for it is reused instead of rendered again;
+    variants of any other source are always rendered under a free name.
+    Pass the already decoded ``original`` to avoid decoding the file again.
+
+    Returns:
+        dict: ``{"source": <original name>, "webp": [{"width", "url"}], ...}``
+    """
+    from blog.storage import ContentAddressedStorage
+
+    if original is None:
+        original = open_image(field_file)
+
+    reuse = isinstance(field_file.storage, ContentAddressedStorage)
+    variants = {"source": field_file.name}
+    widths = [w for w in settings.IMAGE_VARIANT_WIDTHS if w < original.width]
+    for key, (pillow_format, extension) in VARIANT_FORMATS.items():
+        variants[key] = []
+        for width in widths:
+            name = variant_name(field_file.name, width, extension)
+            if not (reuse and default_storage.exists(name)):
+                height = round(original.height * width / original.width)
+                buffer = BytesIO()
+                original.resize((width, height), Image.LANCZOS).save(
+                    buffer,
+                    pillow_format,
+                    quality=settings.IMAGE_VARIANT_QUALITY,
+                    optimize=True,
+                )
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            variants[key].append({"width": width, "url": default_storage.url(name)})
+    return variants
+
+
+def delete_image_variants(source_name):
+    """Remove every variant stored for ``source_name``."""
+    for _, extension in VARIANT_FORMATS.values():
+        for width in settings.IMAGE_VARIANT_WIDTHS:
+            default_storage.delete(variant_name(source_name, width, extension))
+
+
+def delete_stored_variants(variants):
+    """Remove the variant files listed in an `image_variants` value."""
+    for key in VARIANT_FORMATS:
+        for entry in (variants or {}).get(key) or []:
+            url = unquote(entry["url"])
+            if url.startswith(settings.MEDIA_URL):
+                default_storage.delete(url[len(settings.MEDIA_URL):])
+
+
+def build_srcset(variants, request=None):
+    """
+    Format stored variants as ``srcset`` strings, one per format.
+
+    Returns:
+        dict: e.g. ``{"webp": "/media/variants/a_320w.webp 320w, ...", ...}``;
+        empty until the variants have been generated.
+    """
+    srcset = {}
+    for key in VARIANT_FORMATS:
+        entries = (variants or {}).get(key) or []
+        if entries:
+            srcset[key] = ", ".join(
+                "{} {}w".format(
+                    request.build_absolute_uri(entry["url"]) if request else entry["url"],
+                    entry["width"],
+                )
+                for entry in entries
+            )
+    return srcset
+
+
+def build_image_metadata(field_file, image=None):
+    """
+    Compute what clients need to lay out an image before loading it.
+
+    Returns:
+        dict: Values for the `ImageMetadata` columns: ``image_width``,
+        ``image_height``, ``image_size`` (bytes), ``image_color`` (``#rrggbb``)
+        and ``image_blurhash``.
+    """
+    if image is None:
+        image = open_image(field_file)
+    sample = image.resize((METADATA_SAMPLE_SIZE, METADATA_SAMPLE_SIZE), Image.BILINEAR)
+    x_components, y_components = settings.IMAGE_BLURHASH_COMPONENTS
+    return {
+        "image_width": image.width,
+        "image_height": image.height,
+        "image_size": field_file.size,
+        "image_color": dominant_color(sample),
+        "image_blurhash": encode_blurhash(sample, x_components, y_components),
+    }
+
+
+def dominant_color(image):
+    """Return the most common color of ``image`` after quantizing it, as hex."""
+    palette_image = image.quantize(colors=5)
+    palette = palette_image.getpalette()
+    _, index = max(palette_image.getcolors())
+    return "#{:02x}{:02x}{:02x}".format(*palette[index * 3:index * 3 + 3])
+
+
+def _srgb_to_linear(value):
+    value = value / 255
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _encode83(value, length):
+    return "".join(
+        BLURHASH_CHARACTERS[(value // 83 ** (length - i)) % 83]
+        for i in range(1, length + 1)
+    )
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def encode_blurhash(image, x_components=4, y_components=3):
+    """
+    Encode an RGB image as a BlurHash string (https://blurha.sh).
+
+    This follows the reference encoder. It is pure Python, so pass a small
+    thumbnail; the hash only keeps a few low-frequency components anyway.
+    """
+    width, height = image.size
+    linear = [tuple(_srgb_to_linear(c) for c in pixel) for pixel in image.getdata()]
+    cos_x = [
+        [math.cos(math.pi * i * x / width) for x in range(width)]
+        for i in range(x_components)
+    ]
+    cos_y = [
+        [math.cos(math.pi * j * y / height) for y in range(height)]
+        for j in range(y_components)
+    ]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                for x in range(width):
+                    basis = cos_x[i][x] * cos_y[j][y]
+                    pr, pg, pb = linear[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    blurhash = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        maximum = (quantised_max + 1) / 166
+        blurhash += _encode83(quantised_max, 1)
+    else:
+        maximum = 1
+        blurhash += _encode83(0, 1)
+
+    blurhash += _encode83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]),
+        4,
+    )
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, int(_sign_pow(value / maximum, 0.5) * 9 + 9.5)))
+            for value in factor
+        )
+        blurhash += _encode83(r * 19 * 19 + g * 19 + b, 2)
+    return blurhash
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:20
+
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0005_uploadsession"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("size", models.PositiveBigIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=1)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="post",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=blog.storage.image_storage,
+                upload_to="images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="postimages",
+            name="images",
+            field=models.ImageField(
+                storage=blog.storage.image_storage, upload_to="images/"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:30
+
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0007_image_metadata"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="post",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                db_index=True,
+                null=True,
+                storage=blog.storage.image_storage,
+                upload_to="images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="postimages",
+            name="images",
+            field=models.ImageField(
+                db_index=True, storage=blog.storage.image_storage, upload_to="images/"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:00
+
+import blog.storage
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0008_index_image_names"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="post",
+            name="image",
+            field=blog.storage.ContentAddressedImageField(
+                blank=True,
+                db_index=True,
+                null=True,
+                storage=blog.storage.image_storage,
+                upload_to="images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="postimages",
+            name="images",
+            field=blog.storage.ContentAddressedImageField(
+                db_index=True, storage=blog.storage.image_storage, upload_to="images/"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0009_content_addressed_image_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="chunk_started_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
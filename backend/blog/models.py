@@ -1,15 +1,48 @@
-from django.db import models
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models, transaction
 from accounts.models import User
 from django.urls import reverse
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from blog.search import bump_search_generation
+from blog.search_backends import get_search_backend
+from blog.images import schedule_image_variants
+from blog.storage import ContentAddressedImageField, image_storage, pop_stored_image
 
 
 # Create your models here.
-class Post(models.Model):
+class ImageMetadata(models.Model):
+    """
+    precomputed layout data of a model's image, filled in by the background
+    image task so clients can size and placeholder images before loading them.
+    """
+
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_blurhash = models.CharField(max_length=64, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+class Post(ImageMetadata):
     """
     this is class to define posts for blog app
     """
 
-    image = models.ImageField(upload_to="images/", null=True, blank=True)
+    image = ContentAddressedImageField(
+        upload_to="images/",
+        storage=image_storage,
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     auther = models.ForeignKey(User, on_delete=models.CASCADE)
 
@@ -61,8 +94,164 @@ class Comments(models.Model):
     )
 
 
-class PostImages(models.Model):
+class PostImages(ImageMetadata):
     """this is model for create and store more images related with single posts"""
 
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
-    images = models.ImageField(upload_to="images/")
+    images = ContentAddressedImageField(
+        upload_to="images/", storage=image_storage, db_index=True
+    )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+
+class ImageBlob(models.Model):
+    """
+    one stored image file of the content-addressed image storage.
+
+    `name` is the hash-based storage name and `ref_count` the number of
+    image fields pointing at it; the file is deleted when it drops to zero.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=1)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class UploadSession(models.Model):
+    """
+    a resumable upload of one large image, received in chunks.
+
+    Chunks are written straight into a temporary file at their offset; once
+    `offset` reaches `size` the file is attached to `post.image` or added to
+    the post gallery, depending on `target`. `chunk_started_at` is set while
+    a chunk is being received, reserving the current offset for it, and
+    while the finished upload is being attached.
+    """
+
+    TARGET_POST = "post"
+    TARGET_GALLERY = "gallery"
+    TARGET_CHOICES = [
+        (TARGET_POST, "Post image"),
+        (TARGET_GALLERY, "Gallery image"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="upload_sessions")
+    target = models.CharField(max_length=10, choices=TARGET_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    chunk_started_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def temp_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, f"{self.pk}.part")
+
+    @property
+    def is_complete(self):
+        return self.offset == self.size
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, **kwargs):
+    """
+    Signal receiver that, once the transaction commits, bumps the search
+    cache generation (the change may alter cached results) and refreshes
+    the post in the configured search backend.
+    """
+    transaction.on_commit(
+        lambda: get_search_backend().update(
+            instance, generation=bump_search_generation()
+        )
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_image_variants(sender, instance, **kwargs):
+    """Signal receiver that queues resized variants of a new post image."""
+    schedule_image_variants(instance, "image")
+
+
+@receiver(post_save, sender=PostImages)
+def gallery_image_variants(sender, instance, **kwargs):
+    """Signal receiver that queues resized variants of a new gallery image."""
+    schedule_image_variants(instance, "images")
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    """
+    Signal receiver that, once the transaction commits, bumps the search
+    cache generation and drops the deleted post from the search backend.
+    """
+    post_id = instance.pk
+    transaction.on_commit(
+        lambda: get_search_backend().remove(
+            post_id, generation=bump_search_generation()
+        )
+    )
+
+
+def release_image(field_file):
+    """Drop this field's reference to its stored file once the transaction commits."""
+    name, storage = field_file.name, field_file.storage
+    if name:
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+def release_replaced_image(instance, field_name, update_fields):
+    """
+    Release the image stored in the row when ``instance`` is saved with a
+    different one, with none, or with newly stored content.
+
+    Storing content that is already present returns the same hash-based
+    name but still takes a reference, so the previous reference is released
+    whenever content was stored, even if the name did not change. Saves
+    whose `update_fields` leave out the field skip the lookup.
+    """
+    if not instance.pk:
+        return
+    if update_fields is not None and field_name not in update_fields:
+        return
+    field_file = getattr(instance, field_name)
+    stored = pop_stored_image(instance, field_name) or not field_file._committed
+    old = (
+        type(instance)
+        .objects.filter(pk=instance.pk)
+        .values_list(field_name, flat=True)
+        .first()
+    )
+    if old and (stored or old != field_file.name):
+        transaction.on_commit(lambda: image_storage().delete(old))
+
+
+@receiver(pre_save, sender=Post)
+def release_replaced_post_image(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Signal receiver that releases the post image a save replaces."""
+    if not raw:
+        release_replaced_image(instance, "image", update_fields)
+
+
+@receiver(pre_save, sender=PostImages)
+def release_replaced_gallery_image(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """Signal receiver that releases the gallery image a save replaces."""
+    if not raw:
+        release_replaced_image(instance, "images", update_fields)
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    release_image(instance.image)
+
+
+@receiver(post_delete, sender=PostImages)
+def release_gallery_image(sender, instance, **kwargs):
+    release_image(instance.images)
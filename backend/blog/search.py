@@ -0,0 +1,118 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+SEARCH_GENERATION_KEY = "search:generation"
+SEARCH_HITS_KEY = "search:cache:hits"
+SEARCH_MISSES_KEY = "search:cache:misses"
+
+
+def normalize_query(query):
+    """
+    Normalize a raw search query so equivalent inputs share a cache entry.
+
+    Leading/trailing whitespace is stripped, inner whitespace is collapsed
+    and the text is case-folded, so "Django  REST" and "django rest" map
+    to the same key.
+    """
+    return " ".join(query.split()).casefold()
+
+
+def get_search_generation():
+    """Return the current search index generation (0 when never bumped)."""
+    return cache.get(SEARCH_GENERATION_KEY, 0)
+
+
+def bump_search_generation():
+    """
+    Invalidate every cached search result at once.
+
+    Cache keys embed the generation number, so incrementing it makes all
+    previous entries unreachable; they then expire on their own TTL.
+    """
+    try:
+        return cache.incr(SEARCH_GENERATION_KEY)
+    except ValueError:
+        cache.add(SEARCH_GENERATION_KEY, 1, timeout=None)
+        return 1
+
+
+def make_search_cache_key(query, filters=None, page=1):
+    """
+    Build the cache key for a search request.
+
+    Args:
+        query (str): Raw search keyword, normalized before hashing.
+        filters (dict): Extra filter parameters; order does not matter.
+        page (int): Requested result page.
+
+    Returns:
+        str: A key of the form ``search:<generation>:<digest>``.
+    """
+    payload = json.dumps(
+        {"q": normalize_query(query), "filters": filters or {}, "page": page},
+        sort_keys=True,
+    )
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    return f"search:{get_search_generation()}:{digest}"
+
+
+def _record(counter_key, count=1):
+    if not count:
+        return
+    try:
+        cache.incr(counter_key, count)
+    except ValueError:
+        if not cache.add(counter_key, count, timeout=None):
+            cache.incr(counter_key, count)
+
+
+def get_cached_results(key):
+    """Return cached results for ``key`` (or None) and record a hit or miss."""
+    results = cache.get(key)
+    _record(SEARCH_MISSES_KEY if results is None else SEARCH_HITS_KEY)
+    return results
+
+
+def get_many_cached_results(keys):
+    """
+    Fetch several cached result lists in one cache round trip.
+
+    Returns:
+        dict: Mapping of the keys that were found to their results.
+    """
+    found = cache.get_many(keys)
+    _record(SEARCH_HITS_KEY, len(found))
+    _record(SEARCH_MISSES_KEY, len(keys) - len(found))
+    return found
+
+
+def set_cached_results(key, results):
+    cache.set(key, results, timeout=settings.SEARCH_CACHE_TIMEOUT)
+
+
+def set_many_cached_results(mapping):
+    cache.set_many(mapping, timeout=settings.SEARCH_CACHE_TIMEOUT)
+
+
+def get_search_cache_stats():
+    """
+    Return hit/miss counters for the search result cache.
+
+    Returns:
+        dict: ``hits``, ``misses``, ``hit_rate`` (0..1), the active
+        ``generation`` and the configured ``timeout`` in seconds.
+    """
+    counters = cache.get_many([SEARCH_HITS_KEY, SEARCH_MISSES_KEY])
+    hits = counters.get(SEARCH_HITS_KEY, 0)
+    misses = counters.get(SEARCH_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+        "generation": get_search_generation(),
+        "timeout": settings.SEARCH_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,285 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from blog.search import get_search_generation
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into case-folded word tokens."""
+    return TOKEN_RE.findall(text.casefold())
+
+
+def trigrams(token):
+    """
+    Return the trigram set of a token, padded the same way as pg_trgm
+    (two leading spaces, one trailing) so short words still produce grams.
+    """
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _hit(post_id, title):
+    return {"id": post_id, "title": title}
+
+
+class BaseSearchBackend:
+    """
+    Interface every post search backend implements.
+
+    Results are lists of ``{"id": ..., "title": ...}`` dicts, which is the
+    shape cached by `blog.search` and rendered by `SearchPostSerializer`.
+    """
+
+    def search(self, query, filters, page):
+        raise NotImplementedError
+
+    def multi_search(self, specs):
+        """
+        Run several searches at once.
+
+        Args:
+            specs (list): ``(query, filters, page)`` tuples.
+
+        Returns:
+            list: One result list per spec, in the same order.
+        """
+        return [self.search(query, filters, page) for query, filters, page in specs]
+
+    def suggest(self, prefix, size):
+        raise NotImplementedError
+
+    def update(self, post, generation=None):
+        """Index or re-index a single post after it was saved."""
+
+    def remove(self, post_id, generation=None):
+        """Drop a single post from the index after it was deleted."""
+
+
+class ElasticsearchSearchBackend(BaseSearchBackend):
+    """
+    Search backend that queries the `posts` Elasticsearch index.
+
+    Index updates are left to django_elasticsearch_dsl's signal processor,
+    so `update` and `remove` are no-ops here.
+    """
+
+    def build_search(self, query, filters, page):
+        from blog.documents import PostDocument
+
+        search = PostDocument.search().query(
+            "multi_match",
+            query=query,
+            fields=["title"],
+            fuzziness="AUTO",
+        )
+        if "category" in filters:
+            search = search.filter("term", category_id=filters["category"])
+        start = (page - 1) * settings.SEARCH_PAGE_SIZE
+        return search[start:start + settings.SEARCH_PAGE_SIZE]
+
+    def hits_to_results(self, response):
+        return [_hit(int(hit.meta.id), hit.title) for hit in response]
+
+    def search(self, query, filters, page):
+        return self.hits_to_results(self.build_search(query, filters, page).execute())
+
+    def multi_search(self, specs):
+        from elasticsearch.dsl import MultiSearch
+
+        multi_search = MultiSearch()
+        for query, filters, page in specs:
+            multi_search = multi_search.add(self.build_search(query, filters, page))
+        return [self.hits_to_results(response) for response in multi_search.execute()]
+
+    def suggest(self, prefix, size):
+        from blog.documents import PostDocument
+
+        search = (
+            PostDocument.search()
+            .query("match", title_suggest={"query": prefix, "operator": "and"})
+            .source(["title"])
+            .extra(size=size, timeout=settings.SEARCH_SUGGEST_TIMEOUT)
+        )
+        return self.hits_to_results(search.execute())
+
+
+class InMemorySearchBackend(BaseSearchBackend):
+    """
+    Process-local inverted index over post titles.
+
+    Built lazily from the database on first use and kept current by the post
+    signals in `blog.models`. Query words match index words exactly or, as a
+    fuzzy fallback, by trigram similarity of at least
+    `SEARCH_TRIGRAM_THRESHOLD`, mirroring Elasticsearch's `fuzziness` for
+    typo tolerance.
+
+    Each process keeps its own copy; when another process changes a post,
+    the shared search generation moves and this index rebuilds itself on
+    the next query. That is cheap at the scale this backend is meant for:
+    tests and single-node deployments without an Elasticsearch node.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._generation = None
+        self._docs = {}
+        self._postings = defaultdict(set)
+        self._trigrams = defaultdict(set)
+        self._vocabulary = []
+
+    def rebuild(self):
+        from blog.models import Post
+
+        with self._lock:
+            generation = get_search_generation()
+            self._docs = {}
+            self._postings = defaultdict(set)
+            self._trigrams = defaultdict(set)
+            for post_id, title, category_id in Post.objects.values_list(
+                "id", "title", "category_id"
+            ).iterator():
+                self._add(post_id, title, category_id)
+            self._vocabulary = sorted(self._postings)
+            self._generation = generation
+
+    def _ensure_current(self):
+        if self._generation != get_search_generation():
+            self.rebuild()
+
+    def _add(self, post_id, title, category_id):
+        tokens = set(tokenize(title))
+        self._docs[post_id] = (title, category_id, tokens)
+        for token in tokens:
+            if not self._postings[token]:
+                for gram in trigrams(token):
+                    self._trigrams[gram].add(token)
+            self._postings[token].add(post_id)
+
+    def _discard(self, post_id):
+        doc = self._docs.pop(post_id, None)
+        if doc is None:
+            return
+        for token in doc[2]:
+            self._postings[token].discard(post_id)
+            if not self._postings[token]:
+                del self._postings[token]
+                for gram in trigrams(token):
+                    self._trigrams[gram].discard(token)
+
+    def _apply(self, generation, change):
+        """
+        Apply an incremental change made under search generation ``generation``.
+
+        The change is only applied in place when this index was current right
+        before the generation was bumped; otherwise another process changed
+        posts in between and the index is marked stale so the next query
+        rebuilds it from the database.
+        """
+        with self._lock:
+            expected = None if generation is None else generation - 1
+            if self._generation is None or self._generation != expected:
+                self._generation = None
+                return
+            change()
+            self._vocabulary = sorted(self._postings)
+            self._generation = generation
+
+    def update(self, post, generation=None):
+        def change():
+            self._discard(post.pk)
+            self._add(post.pk, post.title, post.category_id)
+
+        self._apply(generation, change)
+
+    def remove(self, post_id, generation=None):
+        self._apply(generation, lambda: self._discard(post_id))
+
+    def _fuzzy_matches(self, token):
+        """Return ``{index_token: similarity}`` for tokens close to ``token``."""
+        if token in self._postings:
+            return {token: 1.0}
+        grams = trigrams(token)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                shared[candidate] += 1
+        matches = {}
+        for candidate, common in shared.items():
+            union = len(grams) + len(trigrams(candidate)) - common
+            similarity = common / union
+            if similarity >= settings.SEARCH_TRIGRAM_THRESHOLD:
+                matches[candidate] = similarity
+        return matches
+
+    def search(self, query, filters, page):
+        with self._lock:
+            self._ensure_current()
+            scores = defaultdict(float)
+            for token in set(tokenize(query)):
+                best = {}
+                for candidate, similarity in self._fuzzy_matches(token).items():
+                    for post_id in self._postings[candidate]:
+                        best[post_id] = max(best.get(post_id, 0.0), similarity)
+                for post_id, similarity in best.items():
+                    scores[post_id] += similarity
+
+            if "category" in filters:
+                scores = {
+                    post_id: score
+                    for post_id, score in scores.items()
+                    if self._docs[post_id][1] == filters["category"]
+                }
+            ranked = sorted(scores, key=lambda post_id: (-scores[post_id], post_id))
+            start = (page - 1) * settings.SEARCH_PAGE_SIZE
+            return [
+                _hit(post_id, self._docs[post_id][0])
+                for post_id in ranked[start:start + settings.SEARCH_PAGE_SIZE]
+            ]
+
+    def _prefix_postings(self, prefix):
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        matches = set()
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches |= self._postings[token]
+        return matches
+
+    def suggest(self, prefix, size):
+        with self._lock:
+            self._ensure_current()
+            tokens = tokenize(prefix)
+            if not tokens:
+                return []
+            matches = None
+            for token in tokens:
+                found = self._prefix_postings(token)
+                matches = found if matches is None else matches & found
+                if not matches:
+                    return []
+            ranked = sorted(
+                matches, key=lambda post_id: (len(self._docs[post_id][0]), post_id)
+            )
+            return [_hit(post_id, self._docs[post_id][0]) for post_id in ranked[:size]]
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Return the backend instance configured by `SEARCH_BACKEND`."""
+    return import_string(settings.SEARCH_BACKEND)()
+
+
+@receiver(setting_changed)
+def reset_search_backend(setting, **kwargs):
+    if setting == "SEARCH_BACKEND":
+        get_search_backend.cache_clear()
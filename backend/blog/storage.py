@@ -0,0 +1,136 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.fields.files import ImageFieldFile
+
+from blog.images import delete_image_variants
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File storage that keeps each distinct file once, named by its SHA-256.
+
+    Uploads are hashed while they are streamed to a temporary file next to
+    the final location. The stored name becomes
+    ``<upload_to>/<h[:2]>/<h[2:4]>/<hash><ext>``; if that file already exists
+    the temporary copy is dropped and the existing file is reused.
+
+    `ImageBlob` rows count how many model fields point at each file, and
+    `delete()` only removes the file once the last reference is gone. Names
+    never change for a given content, so their URLs can be cached forever.
+    The resized variants of a file are shared the same way and removed
+    together with it. Files stored before this backend was introduced have
+    no `ImageBlob` row and are never deleted by it.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save().
+        return name
+
+    def _save(self, name, content):
+        from blog.models import ImageBlob
+
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        os.makedirs(self.location, exist_ok=True)
+
+        hasher = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=self.location, delete=False) as tmp:
+            if hasattr(content, "seek"):
+                content.seek(0)
+            for chunk in content.chunks():
+                hasher.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+
+        digest = hasher.hexdigest()
+        final_name = posixpath.join(directory, digest[:2], digest[2:4], digest + extension)
+        final_path = self.path(final_name)
+        try:
+            with transaction.atomic():
+                blob = ImageBlob.objects.select_for_update().filter(name=final_name).first()
+                if blob is None:
+                    ImageBlob.objects.create(name=final_name, size=size)
+                else:
+                    ImageBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+                if os.path.exists(final_path):
+                    os.remove(tmp.name)
+                else:
+                    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                    os.replace(tmp.name, final_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(final_path, self.file_permissions_mode)
+        except IntegrityError:
+            # Another upload of the same content created the row first.
+            ImageBlob.objects.filter(name=final_name).update(ref_count=F("ref_count") + 1)
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+        return final_name
+
+    def delete(self, name):
+        """Drop one reference to ``name``; remove the file with the last one."""
+        from blog.models import ImageBlob
+
+        if not name:
+            return
+        with transaction.atomic():
+            blob = ImageBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return
+            if blob.ref_count > 1:
+                ImageBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") - 1)
+                return
+            blob.delete()
+            super().delete(name)
+            delete_image_variants(name)
+
+
+class ContentAddressedImageFieldFile(ImageFieldFile):
+    """
+    Image field file that marks its instance whenever it stores content.
+
+    Storing content that is already present returns the name the field may
+    hold already, yet takes another reference. The mark tells the save that
+    follows to release the previous reference even though the name did not
+    change.
+    """
+
+    def save(self, name, content, save=True):
+        self.instance.__dict__.setdefault("_stored_image_fields", set()).add(
+            self.field.attname
+        )
+        super().save(name, content, save)
+
+
+class ContentAddressedImageField(models.ImageField):
+    attr_class = ContentAddressedImageFieldFile
+
+    def pre_save(self, model_instance, add):
+        # an assigned upload is stored here, after the pre_save signal that
+        # already released the previous file
+        file = super().pre_save(model_instance, add)
+        model_instance.__dict__.get("_stored_image_fields", set()).discard(self.attname)
+        return file
+
+
+def pop_stored_image(instance, attname):
+    """Return whether ``instance.<attname>`` stored content since the last save."""
+    stored = instance.__dict__.get("_stored_image_fields", set())
+    if attname in stored:
+        stored.discard(attname)
+        return True
+    return False
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def image_storage():
+    """Storage used by post and gallery images (a callable keeps migrations stable)."""
+    return content_addressed_storage
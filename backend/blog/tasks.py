@@ -0,0 +1,47 @@
+import os
+
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+
+from accounts.cache import bump_profile_version
+from accounts.models import Profile
+from blog.images import build_image_metadata, build_image_variants, open_image
+from blog.models import ImageMetadata, UploadSession
+
+
+@shared_task(ignore_result=True, priority=3, rate_limit="120/m")
+def generate_image_variants(app_label, model_name, pk, field_name, name):
+    """
+    Generate resized variants for an image field and store their URLs in the
+    instance's `image_variants` column. Models with `ImageMetadata` columns
+    also get their dimensions, byte size, dominant color and blurhash,
+    computed from the same decoded image.
+
+    The update is conditional on the field still holding ``name``, so a task
+    that races with a newer upload never overwrites the newer variants.
+    The update sends no `post_save`, so a cached profile is invalidated here.
+    """
+    model = apps.get_model(app_label, model_name)
+    instance = model.objects.filter(pk=pk, **{field_name: name}).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    image = open_image(field_file)
+    values = {"image_variants": build_image_variants(field_file, image)}
+    if issubclass(model, ImageMetadata):
+        values.update(build_image_metadata(field_file, image))
+    updated = model.objects.filter(pk=pk, **{field_name: name}).update(**values)
+    if updated and model is Profile:
+        bump_profile_version(instance.user_id)
+
+
+@shared_task(ignore_result=True, priority=9)
+def cleanup_upload_sessions():
+    """Drop chunked upload sessions, and their temp files, that went stale."""
+    cutoff = timezone.now() - settings.CHUNKED_UPLOAD_EXPIRY
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+        if os.path.exists(session.temp_path):
+            os.remove(session.temp_path)
+        session.delete()
@@ -83,3 +83,182 @@ class TestBlogModels:
         )
 
         assert comment.user == user
+
+
+@pytest.mark.django_db
+class TestImageVariants:
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.IMAGE_VARIANT_WIDTHS = [320, 640, 2000]
+
+    def make_image(self, width=800, height=400):
+        from io import BytesIO
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new("RGB", (width, height), "red").save(buffer, "PNG")
+        return SimpleUploadedFile("photo.png", buffer.getvalue(), "image/png")
+
+    def test_variants_are_generated_and_stored(self, django_capture_on_commit_callbacks):
+        from unittest.mock import patch
+        from blog.tasks import generate_image_variants
+
+        user = User.objects.create_user(email="img@example.com", password="pass")
+        with patch("blog.tasks.generate_image_variants.delay") as mock_delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                post = Post.objects.create(
+                    auther=user, title="Img", content="...", image=self.make_image()
+                )
+        mock_delay.assert_called_once_with("blog", "post", post.pk, "image", post.image.name)
+
+        generate_image_variants(*mock_delay.call_args.args)
+        post.refresh_from_db()
+
+        assert post.image_variants["source"] == post.image.name
+        assert [v["width"] for v in post.image_variants["webp"]] == [320, 640]
+        assert post.image_variants["jpeg"][0]["url"].endswith("_320w.jpg")
+
+    def test_image_metadata_is_stored(self, django_capture_on_commit_callbacks):
+        from unittest.mock import patch
+        from blog.models import PostImages
+        from blog.tasks import generate_image_variants
+
+        user = User.objects.create_user(email="meta@example.com", password="pass")
+        post = Post.objects.create(auther=user, title="Img", content="...")
+        with patch("blog.tasks.generate_image_variants.delay") as mock_delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                image = PostImages.objects.create(post=post, images=self.make_image())
+
+        generate_image_variants(*mock_delay.call_args.args)
+        image.refresh_from_db()
+
+        assert (image.image_width, image.image_height) == (800, 400)
+        assert image.image_size == image.images.size
+        assert image.image_color == "#ff0000"
+        assert len(image.image_blurhash) == 28
+
+    def test_unrelated_save_does_not_requeue(self, django_capture_on_commit_callbacks):
+        from unittest.mock import patch
+
+        user = User.objects.create_user(email="img2@example.com", password="pass")
+        with patch("blog.tasks.generate_image_variants.delay"):
+            post = Post.objects.create(
+                auther=user, title="Img", content="...", image=self.make_image()
+            )
+        Post.objects.filter(pk=post.pk).update(
+            image_variants={"source": post.image.name}
+        )
+        post.refresh_from_db()
+
+        post.title = "Renamed"
+        with patch("blog.tasks.generate_image_variants.delay") as mock_delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                post.save()
+        mock_delay.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestContentAddressedStorage:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, tmp_path):
+        from unittest.mock import patch
+
+        settings.MEDIA_ROOT = tmp_path
+        user = User.objects.create_user(email="blob@example.com", password="pass")
+        self.post = Post.objects.create(auther=user, title="Blob", content="...")
+        with patch("blog.tasks.generate_image_variants.delay"):
+            yield
+
+    def upload(self, data=b"same bytes"):
+        from django.core.files.base import ContentFile
+        from blog.models import PostImages
+
+        image = PostImages(post=self.post)
+        image.images.save("photo.JPG", ContentFile(data), save=True)
+        return image
+
+    def test_identical_uploads_share_one_file(self):
+        import hashlib
+        from blog.models import ImageBlob
+
+        first, second = self.upload(), self.upload()
+        digest = hashlib.sha256(b"same bytes").hexdigest()
+
+        assert first.images.name == second.images.name
+        assert first.images.name == f"images/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+        assert ImageBlob.objects.get(name=first.images.name).ref_count == 2
+
+    def test_file_is_removed_with_last_reference(self, django_capture_on_commit_callbacks):
+        import os
+        from blog.models import ImageBlob
+
+        first, second = self.upload(), self.upload()
+        path = first.images.path
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first.delete()
+        assert os.path.exists(path)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            second.delete()
+        assert not os.path.exists(path)
+        assert not ImageBlob.objects.exists()
+
+    def test_replaced_post_image_is_released(self, django_capture_on_commit_callbacks):
+        from django.core.files.base import ContentFile
+        from blog.models import ImageBlob
+
+        self.post.image.save("old.jpg", ContentFile(b"old bytes"), save=True)
+        old_name = self.post.image.name
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self.post.image.save("new.jpg", ContentFile(b"new bytes"), save=True)
+        assert not ImageBlob.objects.filter(name=old_name).exists()
+
+        new_name = self.post.image.name
+        self.post.image = None
+        with django_capture_on_commit_callbacks(execute=True):
+            self.post.save()
+        assert not ImageBlob.objects.filter(name=new_name).exists()
+
+    def test_same_content_saved_again_keeps_one_reference(
+        self, django_capture_on_commit_callbacks
+    ):
+        import os
+        from django.core.files.base import ContentFile
+        from blog.models import ImageBlob
+
+        self.post.image.save("photo.jpg", ContentFile(b"same bytes"), save=True)
+        with django_capture_on_commit_callbacks(execute=True):
+            self.post.image.save("again.jpg", ContentFile(b"same bytes"), save=True)
+        assert ImageBlob.objects.get(name=self.post.image.name).ref_count == 1
+
+        path = self.post.image.path
+        with django_capture_on_commit_callbacks(execute=True):
+            self.post.delete()
+        assert not os.path.exists(path)
+        assert not ImageBlob.objects.exists()
+
+    def test_identical_uploads_share_variants(self, django_capture_on_commit_callbacks):
+        from io import BytesIO
+        from django.core.files.storage import default_storage
+        from PIL import Image
+        from blog.tasks import generate_image_variants
+
+        buffer = BytesIO()
+        Image.new("RGB", (800, 400), "blue").save(buffer, "PNG")
+        images = [self.upload(buffer.getvalue()) for _ in range(3)]
+        for image in images:
+            generate_image_variants("blog", "postimages", image.pk, "images", image.images.name)
+
+        _, files = default_storage.listdir("variants")
+        assert len(files) == 4
+
+        for image in images:
+            with django_capture_on_commit_callbacks(execute=True):
+                image.delete()
+        assert default_storage.listdir("variants") == ([], [])
@@ -1,3 +1,4 @@
+from unittest.mock import patch
 import pytest
 from django.urls import reverse
 from rest_framework import status
@@ -202,3 +203,435 @@ class TestCommentDetailAndDeleteAPI:
 
         assert response.status_code == 204
         assert Comments.objects.filter(pk=self.comment.pk).exists() is False
+
+
+@pytest.mark.django_db
+class TestSearchPostApiView:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, django_capture_on_commit_callbacks):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse("blog:api:search")
+        self.user = User.objects.create_user(email="search@test.com", password="123456")
+        self.category = Category.objects.create(name="Tech")
+        with django_capture_on_commit_callbacks(execute=True):
+            self.django = Post.objects.create(
+                title="Learning Django", content="...", auther=self.user,
+                category=self.category,
+            )
+            Post.objects.create(title="Cooking pasta", content="...", auther=self.user)
+
+    def test_empty_query_returns_empty_list(self):
+        response = self.client.get(self.url)
+        assert response.status_code == 200
+        assert response.data == []
+
+    def test_fuzzy_match_tolerates_typos(self):
+        response = self.client.get(self.url, {"q": "djangoo"})
+        assert response.status_code == 200
+        assert response.data == [{"id": self.django.pk, "title": "Learning Django"}]
+
+    def test_category_filter(self):
+        response = self.client.get(
+            self.url, {"q": "pasta django", "category": self.category.pk}
+        )
+        assert [hit["id"] for hit in response.data] == [self.django.pk]
+
+    def test_results_are_cached_by_normalized_query(self):
+        from blog.search_backends import InMemorySearchBackend
+
+        with patch.object(
+            InMemorySearchBackend, "search", autospec=True, return_value=[]
+        ) as mock_search:
+            self.client.get(self.url, {"q": "Django "})
+            self.client.get(self.url, {"q": "  django"})
+
+        mock_search.assert_called_once()
+
+    def test_post_save_invalidates_cached_results(self, django_capture_on_commit_callbacks):
+        assert len(self.client.get(self.url, {"q": "rust"}).data) == 0
+        with django_capture_on_commit_callbacks(execute=True):
+            Post.objects.create(title="Rust", content="...", auther=self.user)
+        assert len(self.client.get(self.url, {"q": "rust"}).data) == 1
+
+    def test_cache_stats_report_hit_rate(self):
+        admin = User.objects.create_superuser(email="admin@test.com", password="123456")
+        self.client.get(self.url, {"q": "django"})
+        self.client.get(self.url, {"q": "django"})
+
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse("blog:api:search-cache-stats"))
+        assert response.status_code == 200
+        assert response.data["hits"] == 1
+        assert response.data["misses"] == 1
+        assert response.data["hit_rate"] == 0.5
+
+
+@pytest.mark.django_db
+class TestSuggestPostApiView:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, django_capture_on_commit_callbacks):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse("blog:api:search-suggest")
+        user = User.objects.create_user(email="suggest@test.com", password="123456")
+        with django_capture_on_commit_callbacks(execute=True):
+            for title in ["Django tips", "Django REST framework", "Docker basics"]:
+                Post.objects.create(title=title, content="...", auther=user)
+
+    def test_prefix_suggestions(self):
+        response = self.client.get(self.url, {"q": "dja"})
+        assert [hit["title"] for hit in response.data] == [
+            "Django tips",
+            "Django REST framework",
+        ]
+
+    def test_every_word_must_match(self):
+        response = self.client.get(self.url, {"q": "django re"})
+        assert [hit["title"] for hit in response.data] == ["Django REST framework"]
+
+    def test_size_is_capped(self):
+        from blog.search_backends import InMemorySearchBackend
+
+        with patch.object(
+            InMemorySearchBackend, "suggest", autospec=True, return_value=[]
+        ) as mock_suggest:
+            self.client.get(self.url, {"q": "dja", "size": 100})
+
+        assert mock_suggest.call_args.args[1:] == ("dja", 10)
+
+
+@pytest.mark.django_db
+class TestSearchBatchApiView:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, django_capture_on_commit_callbacks):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse("blog:api:search-batch")
+        user = User.objects.create_user(email="batch@test.com", password="123456")
+        with django_capture_on_commit_callbacks(execute=True):
+            self.post = Post.objects.create(title="Django", content="...", auther=user)
+
+    def test_batch_returns_results_keyed_by_id(self):
+        payload = {
+            "queries": [
+                {"id": "top", "q": "django"},
+                {"id": "related", "q": "rest", "page": 2},
+            ]
+        }
+        response = self.client.post(self.url, payload, format="json")
+
+        assert response.status_code == 200
+        assert response.data == {
+            "top": [{"id": self.post.pk, "title": "Django"}],
+            "related": [],
+        }
+
+    def test_only_uncached_specs_hit_the_backend(self):
+        from blog.search_backends import InMemorySearchBackend
+
+        self.client.post(
+            self.url, {"queries": [{"id": "a", "q": "django"}]}, format="json"
+        )
+        with patch.object(
+            InMemorySearchBackend, "multi_search", autospec=True, return_value=[[]]
+        ) as mock_batch:
+            self.client.post(
+                self.url,
+                {"queries": [{"id": "a", "q": "django"}, {"id": "b", "q": "rest"}]},
+                format="json",
+            )
+
+        assert mock_batch.call_args.args[1] == [("rest", {}, 1)]
+
+    def test_duplicate_ids_are_rejected(self):
+        payload = {"queries": [{"id": "a", "q": "x"}, {"id": "a", "q": "y"}]}
+        response = self.client.post(self.url, payload, format="json")
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestPostImageBatchUploadAPIView:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="gallery@test.com", password="123456")
+        self.post = Post.objects.create(title="Gallery", content="...", auther=self.user)
+        self.url = reverse("blog:api:img_post_batch", kwargs={"pk": self.post.pk})
+        self.client.force_authenticate(user=self.user)
+
+    def make_image(self, name):
+        from io import BytesIO
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new("RGB", (10, 10), "blue").save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+    def test_upload_many_images_at_once(self):
+        from blog.models import PostImages
+
+        files = [self.make_image(f"photo{i}.png") for i in range(3)]
+        with patch("blog.tasks.generate_image_variants.delay"):
+            response = self.client.post(self.url, {"images": files}, format="multipart")
+
+        assert response.status_code == 201
+        assert len(response.data["images"]) == 3
+        assert PostImages.objects.filter(post=self.post).count() == 3
+
+    def test_other_users_post_is_not_found(self):
+        other = User.objects.create_user(email="other@test.com", password="123456")
+        self.client.force_authenticate(user=other)
+        response = self.client.post(
+            self.url, {"images": [self.make_image("a.png")]}, format="multipart"
+        )
+        assert response.status_code == 404
+
+    def test_non_image_file_is_rejected(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        bogus = SimpleUploadedFile("a.png", b"not an image", "image/png")
+        response = self.client.post(self.url, {"images": [bogus]}, format="multipart")
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestChunkedUploadSessions:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, tmp_path):
+        from io import BytesIO
+        from PIL import Image
+
+        settings.MEDIA_ROOT = tmp_path / "media"
+        settings.CHUNKED_UPLOAD_TEMP_DIR = tmp_path / "uploads"
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="chunks@test.com", password="123456")
+        self.post = Post.objects.create(title="Chunks", content="...", auther=self.user)
+        self.client.force_authenticate(user=self.user)
+
+        buffer = BytesIO()
+        Image.new("RGB", (64, 64), "green").save(buffer, "PNG")
+        self.payload = buffer.getvalue()
+
+    def create_session(self, target="gallery", filename="big.png"):
+        response = self.client.post(
+            reverse("blog:api:upload-session-create"),
+            {
+                "post": self.post.pk,
+                "target": target,
+                "filename": filename,
+                "size": len(self.payload),
+            },
+            format="json",
+        )
+        assert response.status_code == 201
+        return reverse("blog:api:upload-session-detail", kwargs={"pk": response.data["id"]})
+
+    def put_chunk(self, url, offset, chunk):
+        return self.client.put(
+            url,
+            data=chunk,
+            content_type="application/octet-stream",
+            headers={"Upload-Offset": str(offset)},
+        )
+
+    def test_chunks_are_assembled_and_attached_to_gallery(self):
+        from blog.models import PostImages, UploadSession
+
+        url = self.create_session()
+        half = len(self.payload) // 2
+        assert self.put_chunk(url, 0, self.payload[:half]).data["offset"] == half
+        response = self.put_chunk(url, half, self.payload[half:])
+        assert response.data["offset"] == len(self.payload)
+
+        with patch("blog.tasks.generate_image_variants.delay"):
+            response = self.client.post(url + "complete/")
+
+        assert response.status_code == 201
+        image = PostImages.objects.get(post=self.post)
+        assert image.images.read() == self.payload
+        assert not UploadSession.objects.exists()
+
+    def test_stored_extension_follows_detected_format(self):
+        from blog.models import PostImages
+
+        url = self.create_session(filename="big.jpg")
+        self.put_chunk(url, 0, self.payload)
+        with patch("blog.tasks.generate_image_variants.delay"):
+            response = self.client.post(url + "complete/")
+
+        assert response.status_code == 201
+        assert PostImages.objects.get(post=self.post).images.name.endswith(".png")
+
+    def test_non_image_filename_is_rejected(self):
+        response = self.client.post(
+            reverse("blog:api:upload-session-create"),
+            {
+                "post": self.post.pk,
+                "target": "gallery",
+                "filename": "x.html",
+                "size": len(self.payload),
+            },
+            format="json",
+        )
+        assert response.status_code == 400
+        assert "filename" in response.data
+
+    def test_wrong_offset_returns_server_offset(self):
+        url = self.create_session()
+        response = self.put_chunk(url, 10, self.payload[10:20])
+        assert response.status_code == 409
+        assert response.data["offset"] == 0
+
+    def test_chunk_in_progress_blocks_its_offset(self, settings):
+        from datetime import timedelta
+        from django.utils import timezone
+        from blog.models import UploadSession
+
+        url = self.create_session()
+        sessions = UploadSession.objects.all()
+        sessions.update(chunk_started_at=timezone.now())
+        response = self.put_chunk(url, 0, self.payload)
+        assert response.status_code == 409
+        assert response.data == {"detail": "chunk in progress", "offset": 0}
+
+        # a reservation left behind by a dead request expires
+        sessions.update(
+            chunk_started_at=timezone.now() - settings.CHUNKED_UPLOAD_CHUNK_TIMEOUT - timedelta(seconds=1)
+        )
+        response = self.put_chunk(url, 0, self.payload)
+        assert response.status_code == 200
+        assert sessions.get().chunk_started_at is None
+
+    def test_chunk_past_declared_size_is_rejected(self):
+        url = self.create_session()
+        response = self.put_chunk(url, 0, self.payload + b"extra")
+        assert response.status_code == 400
+        assert self.client.get(url).data["offset"] == 0
+        # the offset is free again for the corrected chunk
+        assert self.put_chunk(url, 0, self.payload).status_code == 200
+
+    def test_session_being_completed_is_not_attached_twice(self):
+        from django.utils import timezone
+        from blog.models import PostImages, UploadSession
+
+        url = self.create_session()
+        self.put_chunk(url, 0, self.payload)
+        UploadSession.objects.update(chunk_started_at=timezone.now())
+
+        response = self.client.post(url + "complete/")
+        assert response.status_code == 409
+        assert not PostImages.objects.exists()
+
+    def test_invalid_image_releases_the_claim(self):
+        from blog.models import UploadSession
+
+        url = self.create_session()
+        self.put_chunk(url, 0, b"x" * len(self.payload))
+
+        assert self.client.post(url + "complete/").status_code == 400
+        assert UploadSession.objects.get().chunk_started_at is None
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        url = self.create_session(target="post")
+        self.put_chunk(url, 0, self.payload[:10])
+        response = self.client.post(url + "complete/")
+        assert response.status_code == 400
+        assert response.data["offset"] == 10
+
+
+@pytest.mark.django_db
+class TestProtectedMedia:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, tmp_path):
+        from django.core.files.base import ContentFile
+
+        settings.MEDIA_ROOT = tmp_path
+        settings.MEDIA_ACCEL_REDIRECT = True
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="media@test.com", password="123456")
+        with patch("blog.tasks.generate_image_variants.delay"):
+            self.post = Post.objects.create(title="Draft", content="...", auther=self.user)
+            self.post.image.save("photo.jpg", ContentFile(b"jpeg bytes"))
+        self.url = reverse("media", kwargs={"name": self.post.image.name})
+
+    def test_published_image_is_handed_to_nginx(self):
+        Post.objects.filter(pk=self.post.pk).update(status=True)
+        response = self.client.get(self.url)
+
+        assert response.status_code == 200
+        assert response["X-Accel-Redirect"] == "/protected-media/" + self.post.image.name
+        # the post may go back to draft, so shared caches must not keep it
+        assert response["Cache-Control"] == "private, max-age=31536000, immutable"
+        assert response["Content-Type"] == "image/jpeg"
+        assert response.content == b""
+
+    def test_draft_image_is_only_served_to_its_author(self):
+        assert self.client.get(self.url).status_code == 404
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        assert response.status_code == 200
+        assert response["Cache-Control"].startswith("private,")
+
+    def test_draft_gallery_image_is_only_served_to_its_author(self):
+        from django.core.files.base import ContentFile
+        from blog.models import PostImages
+
+        with patch("blog.tasks.generate_image_variants.delay"):
+            gallery = PostImages(post=self.post)
+            gallery.images.save("gallery.jpg", ContentFile(b"gallery bytes"))
+        url = reverse("media", kwargs={"name": gallery.images.name})
+        assert self.client.get(url).status_code == 404
+
+        self.client.force_authenticate(user=self.user)
+        assert self.client.get(url).status_code == 200
+
+    def test_draft_image_variant_is_only_served_to_its_author(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from blog.images import variant_name
+
+        name = default_storage.save(
+            variant_name(self.post.image.name, 320, "webp"), ContentFile(b"webp bytes")
+        )
+        url = reverse("media", kwargs={"name": name})
+        assert self.client.get(url).status_code == 404
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(url)
+        assert response.status_code == 200
+        assert response["Cache-Control"] == "private, max-age=31536000, immutable"
+
+    def test_file_of_no_post_is_public(self, settings):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        name = default_storage.save("avatar.png", ContentFile(b"png bytes"))
+        response = self.client.get(reverse("media", kwargs={"name": name}))
+
+        assert response.status_code == 200
+        assert response["Cache-Control"] == "public, no-cache"
+
+    def test_file_is_streamed_without_nginx(self, settings):
+        settings.MEDIA_ACCEL_REDIRECT = False
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content) == b"jpeg bytes"
+        assert "X-Accel-Redirect" not in response
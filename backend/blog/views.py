@@ -1,2 +1,126 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
 
-# Create your views here.
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from rest_framework.views import APIView
+
+from blog.models import Post, PostImages
+
+# Content-addressed names embed the SHA-256 of the bytes they point at.
+HASHED_NAME_RE = re.compile(r"[0-9a-f]{64}")
+# `<source stem>_<width>w.<ext>`, as written by `build_image_variants`;
+# older variants may carry the storage's random suffix after the width.
+VARIANT_NAME_RE = re.compile(r"(?P<stem>.+)_\d+w(?:_[A-Za-z0-9]{7})?\.\w+")
+
+
+def variant_source_prefix(name):
+    """
+    Return the name prefix of the post image a resized variant was made
+    from, or None when ``name`` is not a variant.
+
+    Content-addressed sources live under ``images/<h[:2]>/<h[2:4]>/``;
+    older ones directly under ``images/``. The extension is not part of
+    the variant name, so the prefix ends with the dot before it.
+    """
+    if not name.startswith(settings.IMAGE_VARIANT_PATH):
+        return None
+    match = VARIANT_NAME_RE.fullmatch(os.path.basename(name))
+    if match is None:
+        return None
+    stem = match["stem"]
+    if HASHED_NAME_RE.fullmatch(stem):
+        return f"images/{stem[:2]}/{stem[2:4]}/{stem}."
+    return f"images/{stem}."
+
+
+def media_cache_control(name, public):
+    """
+    Build the `Cache-Control` header for a media file.
+
+    Hash-named files never change, so they are cached for
+    `MEDIA_CACHE_MAX_AGE` and marked immutable; any other file has to be
+    revalidated. Files whose visibility can change, such as post images
+    that go back to draft, stay private so shared caches never keep them.
+    """
+    scope = "public" if public else "private"
+    if HASHED_NAME_RE.search(os.path.basename(name)):
+        return f"{scope}, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+    return f"{scope}, no-cache"
+
+
+class ProtectedMediaView(APIView):
+    """
+    Serve files from `MEDIA_ROOT` after checking access in Django.
+
+    Images of published posts are served to anyone. Images of draft posts
+    are only served to the post's author and to staff; anyone else gets a
+    404. Resized variants are checked like the image they were made from.
+    Files that belong to no post, such as profile images, are public;
+    behind nginx profile images never reach this view.
+
+    With `MEDIA_ACCEL_REDIRECT` enabled, the response carries no body. It
+    only sets `X-Accel-Redirect` so nginx sends the file from its internal
+    `MEDIA_ACCEL_REDIRECT_LOCATION`. Otherwise, for example with the
+    development server, the file is streamed by Django.
+    """
+
+    permission_classes = ()
+    throttle_classes = ()
+
+    def get(self, request, name):
+        path = safe_join(settings.MEDIA_ROOT, name)
+        public = self.check_media_access(request, name)
+
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if settings.MEDIA_ACCEL_REDIRECT:
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_LOCATION + quote(name)
+        else:
+            if not os.path.isfile(path):
+                raise Http404
+            response = FileResponse(open(path, "rb"), content_type=content_type)
+        response["Cache-Control"] = media_cache_control(name, public)
+        return response
+
+    def check_media_access(self, request, name):
+        """
+        Check whether the requesting user may read ``name``.
+
+        Returns:
+            bool: Whether the file belongs to no post, so its visibility never
+            changes and shared caches may keep it.
+
+        Raises:
+            Http404: The file is an image of a draft post the user does not own.
+        """
+        prefix = variant_source_prefix(name)
+        if prefix is None:
+            post_lookup, gallery_lookup = {"image": name}, {"images": name}
+        else:
+            # the `_like` index serves the prefix match on PostgreSQL
+            post_lookup = {"image__startswith": prefix}
+            gallery_lookup = {"images__startswith": prefix}
+        # one indexed lookup per table; an OR across the join would scan
+        owners = list(
+            Post.objects.filter(**post_lookup)
+            .values_list("status", "auther_id")
+            .union(
+                PostImages.objects.filter(**gallery_lookup).values_list(
+                    "post__status", "post__auther_id"
+                )
+            )
+        )
+        if not owners:
+            return True
+        if any(published for published, _ in owners):
+            return False
+        user = request.user
+        if user.is_authenticated and (
+            user.is_staff or any(auther_id == user.pk for _, auther_id in owners)
+        ):
+            return False
+        raise Http404
@@ -4,3 +4,29 @@ import pytest
 @pytest.fixture(autouse=True)
 def disable_throttling(settings):
     settings.REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = []
+
+
+@pytest.fixture(autouse=True)
+def in_memory_search(settings):
+    settings.SEARCH_BACKEND = "blog.search_backends.InMemorySearchBackend"
+    settings.ELASTICSEARCH_DSL_AUTOSYNC = False
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """Ids are reused between tests, so cached users must not leak across them."""
+    from django.core.cache import cache
+    from accounts.cache import local_tokens, local_users, validated_jwts
+
+    cache.clear()
+    local_users.clear()
+    local_tokens.clear()
+    validated_jwts.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_email_outbox():
+    """The outbox lives outside the default cache, so it is emptied on its own."""
+    from accounts.mail import FLUSH_LOCK_KEY, FLUSH_SCHEDULED_KEY, OUTBOX_KEY, get_outbox
+
+    get_outbox().delete(OUTBOX_KEY, FLUSH_SCHEDULED_KEY, FLUSH_LOCK_KEY)
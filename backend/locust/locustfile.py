@@ -1,5 +1,6 @@
-from locust import HttpUser, task, between
+from locust import HttpUser, task, between, tag
 import random
+import uuid
 
 class AccountUser(HttpUser):
     """
@@ -246,4 +247,105 @@ class BlogUser(HttpUser):
         self.client.delete(
             f"/api/v1/blog/posts/{post_id}/",
             headers=self.headers
-        )
\ No newline at end of file
+        )
+
+
+class LoginUser(HttpUser):
+    """
+    Locust user implementation for measuring login throughput.
+
+    Every task is a full email/password login, so the run is dominated by
+    password hashing. Compare the sync DRF login, which hashes on the
+    request worker, with the async login, which hashes in the
+    `PASSWORD_HASHER_POOL_SIZE` process pool under ASGI.
+
+    Covered endpoints:
+        - Sync JWT login (tag: sync)
+        - Async JWT login (tag: async)
+
+    Usage:
+        locust -f locustfile.py LoginUser --tags async -H http://backend:8000
+
+    Notes:
+        The `login` throttle (5/min per IP) must be raised for the run.
+        Divide the reported requests/s by the CPU cores given to the
+        backend and its hashing pool to get logins per core.
+    """
+    wait_time = between(0, 0.1)
+
+    credentials = {
+        "email": "test@test.com",
+        "password": "12345678"
+    }
+
+    @tag("sync")
+    @task
+    def sync_login(self):
+        self.client.post(
+            "/accounts/api/v1/jwt/custom/",
+            json=self.credentials,
+            name="login (sync)"
+        )
+
+    @tag("async")
+    @task
+    def async_login(self):
+        self.client.post(
+            "/accounts/api/v1/async/jwt/create/",
+            json=self.credentials,
+            name="login (async)"
+        )
+
+
+class RegisterUser(HttpUser):
+    """
+    Locust user implementation for measuring registration throughput.
+
+    Every task registers a new, unique email, so the run measures
+    password hashing plus the single transaction that inserts the user,
+    profile and token. A small share of duplicate registrations checks
+    that the unique constraint answers `400` under concurrency.
+
+    Covered endpoints:
+        - Registration (name: register)
+        - Duplicate registration (name: register (duplicate))
+
+    Usage:
+        locust -f locustfile.py RegisterUser -H http://backend:8000
+
+    Notes:
+        The `register` throttle (1000/day per IP) must be raised for the
+        run. The reported requests/s of `register` is registrations per
+        second.
+    """
+    wait_time = between(0, 0.1)
+
+    password = "StrongPass12345"
+
+    def payload(self, email):
+        return {
+            "email": email,
+            "password": self.password,
+            "password2": self.password
+        }
+
+    @task(20)
+    def register(self):
+        self.client.post(
+            "/accounts/api/v1/register/",
+            json=self.payload(f"locust-{uuid.uuid4().hex}@example.com"),
+            name="register"
+        )
+
+    @task(1)
+    def register_duplicate(self):
+        with self.client.post(
+            "/accounts/api/v1/register/",
+            json=self.payload("test@test.com"),
+            name="register (duplicate)",
+            catch_response=True
+        ) as response:
+            if response.status_code == 400:
+                response.success()
+            else:
+                response.failure(f"expected 400, got {response.status_code}")